@@ -0,0 +1,126 @@
+import argparse
+import random
+import resource
+import time
+
+import degrees
+from util import Node, StackFrontier, QueueFrontier
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark degrees searches")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pair", nargs=2, action="append", default=[],
+                        metavar=("SOURCE", "TARGET"),
+                        help="also time the search between two named people")
+    parser.add_argument("--frontiers", action="store_true",
+                        help="benchmark the frontier classes instead of searches")
+    args = parser.parse_args()
+
+    if args.frontiers:
+        benchmark_frontiers()
+        return
+
+    start = time.perf_counter()
+    degrees.load_data(args.directory)
+    print(f"Loaded {args.directory} in {time.perf_counter() - start:.3f}s")
+    report_memory()
+
+    pairs = named_pairs(args.pair) + random_pairs(args.queries, args.seed)
+    benchmark_searches(pairs)
+
+
+def named_pairs(names):
+    """
+    Returns (source, target) person_id pairs for (name, name) pairs,
+    taking the first person_id when a name is ambiguous.
+    """
+    pairs = []
+    for source, target in names:
+        source_ids = sorted(degrees.names.get(source.lower(), ()))
+        target_ids = sorted(degrees.names.get(target.lower(), ()))
+        if not source_ids or not target_ids:
+            raise Exception(f"Person not found: {source} or {target}")
+        pairs.append((source_ids[0], target_ids[0]))
+    return pairs
+
+
+def random_pairs(count, seed):
+    """
+    Returns `count` reproducible (source, target) person_id pairs,
+    drawn from people who starred in at least one movie.
+    """
+    rng = random.Random(seed)
+    graph = degrees.graph
+    person_ids = sorted(
+        person_id for person, person_id in enumerate(graph.person_ids)
+        if graph.movies_of(person)
+    )
+    return [(rng.choice(person_ids), rng.choice(person_ids)) for _ in range(count)]
+
+
+def benchmark_searches(pairs):
+    """
+    Times every search algorithm over the same pairs and checks
+    that they agree on the number of degrees.
+    """
+    lengths = {}
+    for name, search in degrees.ALGORITHMS.items():
+        timings = []
+        for source, target in pairs:
+            start = time.perf_counter()
+            path = search(source, target)
+            timings.append(time.perf_counter() - start)
+            length = None if path is None else len(path)
+            if lengths.setdefault((source, target), length) != length:
+                raise Exception(f"{name} disagrees on {source} -> {target}")
+        report(name, timings)
+
+
+def benchmark_frontiers(sizes=(1000, 10000, 100000)):
+    """
+    Times filling and draining each frontier class with a membership
+    test per operation, for growing frontier sizes. Time per operation
+    stays flat when add, remove and contains_state are O(1).
+    """
+    for frontier_class in (StackFrontier, QueueFrontier):
+        for size in sizes:
+            frontier = frontier_class()
+            start = time.perf_counter()
+            for i in range(size):
+                frontier.contains_state(i)
+                frontier.add(Node(i, None, None))
+            while not frontier.empty():
+                frontier.contains_state(frontier.remove().state)
+            elapsed = time.perf_counter() - start
+            print(f"{frontier_class.__name__:>14}: {size:>7} nodes in {elapsed:.3f}s, "
+                  f"{elapsed / size * 1e6:.2f}us per node")
+
+
+def report_memory():
+    """
+    Prints the size of the star graph arrays and the peak resident set size.
+    """
+    graph = degrees.graph
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{len(graph.person_ids)} people, {len(graph.movie_ids)} movies, "
+          f"{len(graph.person_movies)} stars")
+    stats = graph.component_stats()
+    print(f"{stats['components']} components, largest has {stats['largest']} people, "
+          f"{stats['isolated']} isolated people")
+    print(f"Graph arrays: {graph.nbytes() / 2 ** 20:.1f} MiB, "
+          f"peak RSS: {peak / 2 ** 10:.1f} MiB")
+
+
+def report(name, timings):
+    timings = sorted(timings)
+    total = sum(timings)
+    median = timings[len(timings) // 2]
+    print(f"{name:>14}: total {total:.3f}s, median {median * 1000:.2f}ms, "
+          f"max {timings[-1] * 1000:.2f}ms over {len(timings)} queries")
+
+
+if __name__ == "__main__":
+    main()
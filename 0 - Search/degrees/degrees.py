@@ -1,89 +1,331 @@
+import argparse
 import csv
+import gc
+import itertools
+import json
+import multiprocessing
+import os
+import re
 import sys
+import time
 
+import snapshot
+from graph import StarGraph
+from nameindex import NameIndex
+from paths import PathDAG
+from tables import DistanceTable, reverse_path
 from util import Node, StackFrontier, QueueFrontier
 
 
-# Maps names to a set of corresponding person_ids
+# Maps names to a tuple of corresponding person_ids
 names = {}
 
-# Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
+# NameIndex over the keys of names for prefix and fuzzy lookups
+name_index = None
+
+# Maps person_ids to a Person: name, birth
 people = {}
 
-# Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
+# Maps movie_ids to a Movie: title, year
 movies = {}
 
+# StarGraph holding which people starred in which movies
+graph = None
+
+# Directory the data was loaded from
+data_directory = None
+
+# Maps hub person_ids to their DistanceTable, or None until first used
+hubs = {}
+
+# Source file stats of every delta applied on top of the loaded data
+applied_deltas = []
+
+
+# Size of the read buffer used when parsing the CSV files
+CSV_BUFFER = 1 << 20
+
+
+class Person():
+    __slots__ = ("name", "birth")
+
+    def __init__(self, name, birth):
+        self.name = name
+        self.birth = birth
+
+
+class Movie():
+    __slots__ = ("title", "year")
+
+    def __init__(self, title, year):
+        self.title = title
+        self.year = year
+
 
 def load_data(directory):
     """
     Load data from CSV files into memory.
+
+    The first load writes a binary snapshot next to the CSV files,
+    which later loads map instead of parsing the CSVs again. The name
+    index is ready once loaded, before any batch worker is forked.
+    """
+    global data_directory, name_index
+    data_directory = directory
+    name_index = None
+
+    # Loading only allocates objects that live on, so garbage collection
+    # passes during the load cannot free anything
+    gc.disable()
+    try:
+        load_records(directory)
+    finally:
+        gc.enable()
+
+
+def load_records(directory):
+    """
+    Fill people, movies, the graph and the name index from the snapshot
+    or the CSV files.
+    """
+    global graph, name_index
+
+    # Use the snapshot if the CSV files have not changed since it was written
+    cached = snapshot.load(directory)
+    if cached is not None:
+        person_rows, movie_rows, graph, name_arrays = cached
+        for person_id, name, birth in person_rows:
+            add_person(person_id, name, sys.intern(birth))
+        for movie_id, title, year in movie_rows:
+            add_movie(movie_id, title, sys.intern(year))
+
+        # People listed twice under one ID leave names in another order,
+        # which the indexed keys no longer match
+        keys, *arrays = name_arrays
+        if keys == list(names):
+            name_index = NameIndex.from_arrays(names, *arrays)
+        else:
+            name_index = NameIndex(names)
+    else:
+        graph = load_csv(directory)
+        name_index = NameIndex(names)
+        snapshot.save(directory, people, movies, graph, name_index)
+
+
+def load_csv(directory):
+    """
+    Parse the CSV files into people and movies and
+    return the StarGraph of their stars.
+
+    Rows are read positionally from large buffered reads, and the
+    birth and release years, which repeat a lot, are interned.
+    Blank lines are skipped, as csv.DictReader skipped them.
     """
     # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
+    with open(f"{directory}/people.csv", encoding="utf-8", newline="", buffering=CSV_BUFFER) as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for person_id, name, birth in filter(None, reader):
+            add_person(person_id, name, sys.intern(birth))
 
     # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
+    with open(f"{directory}/movies.csv", encoding="utf-8", newline="", buffering=CSV_BUFFER) as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        for movie_id, title, year in filter(None, reader):
+            add_movie(movie_id, title, sys.intern(year))
 
     # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
-            
+    with open(f"{directory}/stars.csv", encoding="utf-8", newline="", buffering=CSV_BUFFER) as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        return StarGraph(list(people), list(movies), filter(None, reader))
+
+
+def add_person(person_id, name, birth):
+    people[person_id] = Person(name, birth)
+    key = name.lower()
+    if key not in names:
+        names[key] = (person_id,)
+        if name_index is not None:
+            name_index.add(key)
+    elif person_id not in names[key]:
+        names[key] += (person_id,)
+
+
+def add_movie(movie_id, title, year):
+    movies[movie_id] = Movie(title, year)
+
+
+def apply_delta(directory):
+    """
+    Applies the rows in a delta directory's people.csv, movies.csv and
+    stars.csv, each optional, on top of the loaded data without reloading.
+
+    New people and movies are added to the graph and the name index,
+    components joined by new stars are merged, and only the distance
+    tables of hubs whose component gained stars are dropped.
+    """
+    def rows(name):
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8", newline="", buffering=CSV_BUFFER) as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            # Skip blank lines, such as a trailing newline
+            yield from filter(None, reader)
+
+    for person_id, name, birth in rows("people.csv"):
+        if person_id not in people:
+            add_person(person_id, name, sys.intern(birth))
+            graph.add_person(person_id)
+    for movie_id, title, year in rows("movies.csv"):
+        if movie_id not in movies:
+            add_movie(movie_id, title, sys.intern(year))
+            graph.add_movie(movie_id)
+
+    touched = set()
+    for person_id, movie_id in rows("stars.csv"):
+        person = graph.person_index.get(person_id)
+        movie = graph.movie_index.get(movie_id)
+        if person is None or movie is None:
+            continue
+        label = graph.add_star(person, movie)
+        if label is not None:
+            touched.add(label)
+
+    # Labels may have been merged again after they were touched
+    touched = {graph.find(label) for label in touched}
+    for person_id in hubs:
+        if graph.component_of(graph.person_index[person_id]) in touched:
+            hubs[person_id] = None
+
+    applied_deltas.append(snapshot.source_stats(directory, missing_ok=True))
+
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(description="Degrees of separation")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--algorithm", choices=sorted(ALGORITHMS), default="bfs")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="answer tab-separated name pairs from FILE, or - for stdin")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(),
+                        help="number of worker processes in batch mode")
+    parser.add_argument("--hub", action="append", default=[], metavar="NAME",
+                        help="answer queries involving NAME from a precomputed BFS table")
+    parser.add_argument("--delta", action="append", default=[], metavar="DIR",
+                        help="apply rows appended in DIR's CSV files after loading")
+    parser.add_argument("--paths", type=int, metavar="K",
+                        help="list up to K shortest paths, most recent movies first")
+    args = parser.parse_args()
 
     # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    log = sys.stderr if args.batch else sys.stdout
+    print("Loading data...", file=log)
+    load_data(args.directory)
+    for directory in args.delta:
+        apply_delta(directory)
+    print("Data loaded.", file=log)
+
+    for name in args.hub:
+        person_id = person_id_for_name(name)
+        if person_id is None:
+            sys.exit(f"Hub '{name}' does not name exactly one person.")
+        add_hub(person_id)
+        # Load or build the table now, before batch workers are forked,
+        # rather than once in every worker
+        distance_table(person_id)
 
-    source = person_id_for_name(input("Name: "))
-    #source = person_id_for_name('Tom Cruise')
+    if args.batch:
+        if args.batch == "-":
+            run_batch(args.directory, sys.stdin, args.workers, args.algorithm, args.delta, list(hubs))
+        else:
+            with open(args.batch, encoding="utf-8") as f:
+                run_batch(args.directory, f, args.workers, args.algorithm, args.delta, list(hubs))
+        return
+
+    source = prompt_person()
     if source is None:
         sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
-    #target = person_id_for_name('Tom Hanks')
+    target = prompt_person()
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if args.paths is not None:
+        count = count_shortest_paths(source, target)
+        if count == 0:
+            print("Not connected.")
+            return
+        print(f"{count} shortest paths, showing up to {args.paths}.")
+        for path in k_shortest_paths(source, target, args.paths):
+            print()
+            print_path(source, path)
+        return
+
+    path = find_path(source, target, args.algorithm)
     if path is None:
         print("Not connected.")
     else:
-        degrees = len(path)
-        print(f"{degrees} degrees of separation.")
-        path = [(0,(None, source))] + path
-        for i in range(degrees):
-            person1 = people[path[i][1][1]]["name"]
-            person2 = people[path[i + 1][1][1]]["name"]
-            movie = movies[path[i + 1][1][0]]["title"]
-            print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+        print_path(source, path)
+
+
+def print_path(source, path):
+    degrees = len(path)
+    print(f"{degrees} degrees of separation.")
+    path = [(None, source)] + path
+    for i in range(degrees):
+        person1 = people[path[i][1]].name
+        person2 = people[path[i + 1][1]].name
+        movie = movies[path[i + 1][0]].title
+        print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+
+
+def find_path(source, target, algorithm="bfs"):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs that connect
+    the source to the target, reading it from a hub's distance table when
+    either end is a hub and searching with `algorithm` otherwise.
+    """
+    if source in hubs:
+        path = distance_table(source).path_to(graph.person_index[target])
+        return None if path is None else graph.path_ids(path)
+    if target in hubs:
+        path = distance_table(target).path_to(graph.person_index[source])
+        if path is None:
+            return None
+        return graph.path_ids(reverse_path(path, graph.person_index[target]))
+    return ALGORITHMS[algorithm](source, target)
+
+
+def add_hub(person_id):
+    """
+    Registers a person whose distance table is used for every
+    query they take part in. The table is loaded on first use.
+    """
+    hubs.setdefault(person_id, None)
+
+
+def distance_table(person_id):
+    """
+    Returns the DistanceTable of a person_id, loading it from the
+    data directory or computing and saving it if it is not cached.
+    """
+    table = hubs.get(person_id)
+    if table is not None:
+        return table
+
+    stats = {
+        "data": snapshot.source_stats(data_directory),
+        "deltas": applied_deltas,
+    }
+    filename = os.path.join(data_directory, "bfs-tables", f"{person_id}.bfs")
+    table = DistanceTable.load(filename, stats)
+    if table is None or len(table.distance) != len(graph.person_ids):
+        table = DistanceTable.build(graph, graph.person_index[person_id])
+        table.save(filename, stats)
+    hubs[person_id] = table
+    return table
 
 
 def shortest_path(source, target):
@@ -93,60 +335,321 @@ def shortest_path(source, target):
 
     If no possible path, returns None.
     """
-    
-    start = Node((0,(None, source)),None,None)
+    source = graph.person_index[source]
+    target = graph.person_index[target]
+    if source == target:
+        return []
+    if not graph.connected(source, target):
+        return None
+
+    # Nodes hold a person index as state and the shared movie as action
     frontier = QueueFrontier()
-    frontier.add(start)
-    
-    explored = [] 
-    
-    
-    while True:
-        
-        if frontier.empty():
-            return None
-        
+    frontier.add(Node(source, None, None))
+    explored = set()
+
+    while not frontier.empty():
         node = frontier.remove()
-        
-        if node.state[1][1] == target:
-            solution = []
-            while node.parent is not None:
-                solution.append(node.state)
-                node = node.parent
-            return solution[::-1]
-        
-        explored.append(node.state[1][1])
-        
-        for neighbor in enumerate(neighbors_for_person(node.state[1][1])):
-            if not neighbor[1][1] in explored:
-                child = Node(neighbor, node, None)
-                frontier.add(child)
-    
-
-def person_id_for_name(name):
-    """
-    Returns the IMDB id for a person's name,
-    resolving ambiguities as needed.
-    """
-    person_ids = list(names.get(name.lower(), set()))
-    if len(person_ids) == 0:
+        explored.add(node.state)
+
+        for movie, person in graph.neighbors(node.state):
+            if person in explored or frontier.contains_state(person):
+                continue
+            child = Node(person, node, movie)
+
+            # Stop as soon as the target is discovered
+            if person == target:
+                solution = []
+                while child.parent is not None:
+                    solution.append((child.action, child.state))
+                    child = child.parent
+                solution.reverse()
+                return graph.path_ids(solution)
+
+            frontier.add(child)
+
+    return None
+
+
+def all_shortest_paths(source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs that
+    connect the source to the target, one at a time.
+    """
+    dag = PathDAG.build(graph, graph.person_index[source], graph.person_index[target])
+    if dag is None:
+        return
+    for path in dag.paths():
+        yield graph.path_ids(path)
+
+
+def count_shortest_paths(source, target):
+    """
+    Returns the number of shortest paths between two people,
+    0 if they are not connected.
+    """
+    dag = PathDAG.build(graph, graph.person_index[source], graph.person_index[target])
+    return 0 if dag is None else dag.count()
+
+
+def k_shortest_paths(source, target, k):
+    """
+    Returns up to k shortest lists of (movie_id, person_id) pairs that
+    connect the source to the target, preferring paths through more
+    recent movies: by the highest total (and so average) release year.
+    """
+    dag = PathDAG.build(graph, graph.person_index[source], graph.person_index[target])
+    if dag is None:
+        return []
+    return [graph.path_ids(path) for path in itertools.islice(dag.best_paths(movie_year), k)]
+
+
+def movie_year(movie):
+    """
+    Returns the release year of a movie index, or 0 if unknown.
+    """
+    year = movies[graph.movie_ids[movie]].year
+    return int(year) if year.isdigit() else 0
+
+
+def shortest_path_bidirectional(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching breadth-first
+    from both ends at once and meeting in the middle.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+    source = graph.person_index[source]
+    target = graph.person_index[target]
+    if not graph.connected(source, target):
         return None
-    elif len(person_ids) > 1:
-        print(f"Which '{name}'?")
-        for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
-            print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
-        try:
-            person_id = input("Intended Person ID: ")
-            if person_id in person_ids:
-                return person_id
-        except ValueError:
-            pass
+
+    # Maps person index to (movie, previous person, depth) on each side
+    forward = {source: (None, None, 0)}
+    backward = {target: (None, None, 0)}
+    forward_layer = [source]
+    backward_layer = [target]
+
+    while forward_layer and backward_layer:
+
+        # Always grow the smaller frontier by one full layer
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meeting = expand_layer(forward_layer, forward, backward)
+        else:
+            backward_layer, meeting = expand_layer(backward_layer, backward, forward)
+
+        if meeting is not None:
+            return graph.path_ids(join_paths(meeting, forward, backward))
+
+    return None
+
+
+def expand_layer(layer, visited, other):
+    """
+    Expands every person index in a BFS layer, recording parents in `visited`.
+
+    Returns the next layer and the person where this side met the other
+    side with the smallest total depth, or None if the sides did not meet.
+    """
+    next_layer = []
+    meeting = None
+    best = None
+    for person in layer:
+        depth = visited[person][2] + 1
+        for movie, neighbor in graph.neighbors(person):
+            if neighbor in visited:
+                continue
+            visited[neighbor] = (movie, person, depth)
+            next_layer.append(neighbor)
+            if neighbor in other:
+                total = depth + other[neighbor][2]
+                if best is None or total < best:
+                    best = total
+                    meeting = neighbor
+    return next_layer, meeting
+
+
+def join_paths(meeting, forward, backward):
+    """
+    Joins the forward and backward parent chains at the meeting person
+    into a single list of (movie, person) index pairs.
+    """
+    path = []
+    person = meeting
+    while forward[person][1] is not None:
+        movie, previous, _ = forward[person]
+        path.append((movie, person))
+        person = previous
+    path.reverse()
+
+    person = meeting
+    while backward[person][1] is not None:
+        movie, following, _ = backward[person]
+        path.append((movie, following))
+        person = following
+    return path
+
+
+def person_id_for_name(name, birth=None):
+    """
+    Returns the IMDB id for a person's name, or None if no single person
+    matches. A birth year, given as an argument or as a "Name (1958)"
+    suffix, narrows down people sharing a name. Names with no exact match
+    resolve to the closest fuzzy match, if only one person is closest.
+    """
+    name, birth = split_birth(name, birth)
+    person_ids = with_birth(names.get(name.lower(), ()), birth)
+    if person_ids:
+        return person_ids[0] if len(person_ids) == 1 else None
+
+    closest = None
+    for distance, match in name_index.fuzzy(name):
+        if closest is not None and distance > closest:
+            break
+        closest = distance
+        person_ids.extend(with_birth(names[match], birth))
+    return person_ids[0] if len(person_ids) == 1 else None
+
+
+def candidates_for_name(name, birth=None, limit=10):
+    """
+    Returns up to `limit` person_ids that a name may refer to, ranked:
+    exact matches first, then names starting with it, then fuzzy matches
+    by edit distance. People with more movies come first within a rank.
+    """
+    name, birth = split_birth(name, birth)
+    ranked = [name.lower()]
+    ranked.extend(name_index.prefix(name, limit))
+    ranked.extend(match for _, match in name_index.fuzzy(name, limit))
+
+    candidates = []
+    for match in ranked:
+        for person_id in sorted(with_birth(names.get(match, ()), birth), key=movie_count, reverse=True):
+            if person_id not in candidates:
+                candidates.append(person_id)
+    return candidates[:limit]
+
+
+def split_birth(name, birth):
+    """
+    Splits a trailing "(year)" off a name, unless a birth year is given.
+    """
+    match = re.fullmatch(r"\s*(.*?)\s*\((\d{4})\)\s*", name)
+    if match is None:
+        return name.strip(), birth
+    return match.group(1), birth if birth is not None else match.group(2)
+
+
+def with_birth(person_ids, birth):
+    """
+    Returns the person_ids born in a given year, or all of them if it is None.
+    """
+    return [
+        person_id for person_id in person_ids
+        if birth is None or people[person_id].birth == str(birth)
+    ]
+
+
+def movie_count(person_id):
+    return len(graph.movies_of(graph.person_index[person_id]))
+
+
+def prompt_person():
+    """
+    Asks for a name, letting the user pick from
+    the candidates when it does not resolve to one person.
+    """
+    name = input("Name: ")
+    person_id = person_id_for_name(name)
+    if person_id is not None:
+        return person_id
+
+    candidates = candidates_for_name(name)
+    if not candidates:
         return None
+    print(f"Which '{name}'?")
+    for person_id in candidates:
+        person = people[person_id]
+        name = person.name
+        birth = person.birth
+        print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
+    person_id = input("Intended Person ID: ")
+    if person_id in candidates:
+        return person_id
+    return None
+
+
+def run_batch(directory, lines, workers, algorithm, deltas=(), hub_ids=()):
+    """
+    Answers one query per line of "source<TAB>target" names and writes
+    one JSON object per query to stdout, in input order.
+
+    Queries are spread over a pool of worker processes. Where processes
+    are forked they share the already loaded data read-only; otherwise
+    every worker loads the data itself once, applying the same delta
+    directories and registering the same hubs as the parent.
+    """
+    tasks = (
+        (line.rstrip("\n").split("\t"), algorithm)
+        for line in lines if line.strip()
+    )
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+        pool = context.Pool(workers)
     else:
-        return person_ids[0]
+        pool = multiprocessing.Pool(workers, initializer=load_worker, initargs=(directory, deltas, hub_ids))
+    with pool:
+        for result in pool.imap(batch_query, tasks, chunksize=16):
+            print(json.dumps(result), flush=True)
+
+
+def load_worker(directory, deltas, hub_ids):
+    """
+    Loads the data in a batch worker that was not forked from a
+    process that already had it.
+    """
+    load_data(directory)
+    for delta in deltas:
+        apply_delta(delta)
+    for person_id in hub_ids:
+        add_hub(person_id)
+        distance_table(person_id)
+
+
+def batch_query(task):
+    """
+    Runs a single batch query and returns its JSON-serializable result.
+    """
+    pair, algorithm = task
+    result = {"source": pair[0], "target": pair[-1]}
+    if len(pair) != 2:
+        result["error"] = "expected two tab-separated names"
+        return result
+
+    start = time.perf_counter()
+    person_ids = []
+    for name in pair:
+        person_id = person_id_for_name(name)
+        if person_id is None:
+            result["error"] = f"no unique person matches '{name}'"
+            result["seconds"] = time.perf_counter() - start
+            return result
+        person_ids.append(person_id)
+
+    path = find_path(*person_ids, algorithm)
+    result["seconds"] = time.perf_counter() - start
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+    else:
+        result["degrees"] = len(path)
+        result["path"] = [
+            {"movie": movies[movie_id].title, "person": people[person_id].name}
+            for movie_id, person_id in path
+        ]
+    return result
 
 
 def neighbors_for_person(person_id):
@@ -154,12 +657,15 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
-    neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
-    return neighbors
+    person = graph.person_index[person_id]
+    return set(graph.path_ids(graph.neighbors(person)))
+
+
+# Search algorithms selectable with --algorithm
+ALGORITHMS = {
+    "bfs": shortest_path,
+    "bidirectional": shortest_path_bidirectional,
+}
 
 
 if __name__ == "__main__":
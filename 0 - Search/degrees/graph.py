@@ -0,0 +1,308 @@
+from array import array
+
+
+class StarGraph():
+    """
+    Bipartite graph of people and the movies they starred in.
+
+    People and movies are mapped to dense integer indices and the star
+    edges are stored twice as CSR adjacency: `person_offsets` and
+    `person_movies` list the movies of each person, `movie_offsets` and
+    `movie_people` list the stars of each movie.
+
+    `component` labels every person with the index of its connected
+    component and `component_sizes` holds the number of people in each.
+
+    People, movies and stars added after the graph was built live in
+    overlay dictionaries next to the CSR arrays. Components joined by new
+    stars are merged through `merged`, a union-find over the labels.
+    """
+
+    def __init__(self, person_ids, movie_ids, stars):
+        """
+        Build the graph from lists of person and movie IDs and an iterable
+        of (person_id, movie_id) star pairs. Pairs naming an unknown person
+        or movie and duplicate pairs are dropped.
+        """
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        self.person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        self.movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+        edge_people = array("l")
+        edge_movies = array("l")
+        for person_id, movie_id in stars:
+            try:
+                person = self.person_index[person_id]
+                movie = self.movie_index[movie_id]
+            except KeyError:
+                continue
+            edge_people.append(person)
+            edge_movies.append(movie)
+
+        offsets, targets = build_csr(len(person_ids), edge_people, edge_movies)
+        self.person_offsets, self.person_movies = dedupe_csr(offsets, targets)
+        self.movie_offsets, self.movie_people = transpose_csr(
+            self.person_offsets, self.person_movies, len(movie_ids)
+        )
+        self.component, self.component_sizes = label_components(
+            len(person_ids), self.movie_offsets, self.movie_people
+        )
+        self.extra_movies = {}
+        self.extra_stars = {}
+        self.merged = {}
+
+    @classmethod
+    def from_arrays(cls, person_ids, movie_ids, person_offsets, person_movies,
+                    movie_offsets, movie_people, component, component_sizes):
+        """
+        Build the graph directly from previously computed CSR arrays.
+        """
+        graph = cls.__new__(cls)
+        graph.person_ids = person_ids
+        graph.movie_ids = movie_ids
+        graph.person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        graph.movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+        graph.person_offsets = person_offsets
+        graph.person_movies = person_movies
+        graph.movie_offsets = movie_offsets
+        graph.movie_people = movie_people
+        graph.component = component
+        graph.component_sizes = component_sizes
+        graph.extra_movies = {}
+        graph.extra_stars = {}
+        graph.merged = {}
+        return graph
+
+    def movies_of(self, person):
+        """
+        Returns the movie indices a person index starred in.
+        """
+        if person < len(self.person_offsets) - 1:
+            movies = self.person_movies[self.person_offsets[person]:self.person_offsets[person + 1]]
+        else:
+            movies = ()
+        extra = self.extra_movies.get(person)
+        return movies if extra is None else list(movies) + extra
+
+    def stars_of(self, movie):
+        """
+        Returns the person indices who starred in a movie index.
+        """
+        if movie < len(self.movie_offsets) - 1:
+            stars = self.movie_people[self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+        else:
+            stars = ()
+        extra = self.extra_stars.get(movie)
+        return stars if extra is None else list(stars) + extra
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people who starred
+        with a given person index, including the person itself.
+        """
+        if self.extra_stars:
+            for movie in self.movies_of(person):
+                for star in self.stars_of(movie):
+                    yield movie, star
+            return
+
+        movie_offsets = self.movie_offsets
+        movie_people = self.movie_people
+        for movie in self.movies_of(person):
+            for i in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_people[i]
+
+    def component_of(self, person):
+        """
+        Returns the current component label of a person index.
+        """
+        return self.find(self.component[person])
+
+    def find(self, label):
+        """
+        Returns the label a component label has been merged into.
+        """
+        while label in self.merged:
+            parent = self.merged[label]
+            self.merged[label] = self.merged.get(parent, parent)
+            label = parent
+        return label
+
+    def connected(self, person, other):
+        """
+        Returns True if two person indices are in the same component.
+        """
+        if not self.merged:
+            return self.component[person] == self.component[other]
+        return self.component_of(person) == self.component_of(other)
+
+    def component_stats(self):
+        """
+        Returns a dictionary describing the sizes of the components.
+        Merged-away components have size 0 and are not counted.
+        """
+        sizes = self.component_sizes
+        return {
+            "components": sum(1 for size in sizes if size),
+            "largest": max(sizes, default=0),
+            "isolated": sum(1 for size in sizes if size == 1),
+        }
+
+    def add_person(self, person_id):
+        """
+        Adds a person with no movies yet, in a component of its own,
+        and returns its index.
+        """
+        self.make_writable()
+        person = len(self.person_ids)
+        self.person_ids.append(person_id)
+        self.person_index[person_id] = person
+        self.component.append(len(self.component_sizes))
+        self.component_sizes.append(1)
+        return person
+
+    def add_movie(self, movie_id):
+        """
+        Adds a movie with no stars yet and returns its index.
+        """
+        movie = len(self.movie_ids)
+        self.movie_ids.append(movie_id)
+        self.movie_index[movie_id] = movie
+        return movie
+
+    def add_star(self, person, movie):
+        """
+        Adds a star edge between a person and a movie index, merging
+        components if it joins two. Returns the component label that the
+        edge landed in, or None if the edge was already present.
+        """
+        if movie in self.movies_of(person):
+            return None
+        self.extra_movies.setdefault(person, []).append(movie)
+        stars = self.stars_of(movie)
+        self.extra_stars.setdefault(movie, []).append(person)
+
+        label = self.component_of(person)
+        for star in stars:
+            other = self.component_of(star)
+            if other != label:
+                label = self.merge(label, other)
+            break
+        return label
+
+    def merge(self, label, other):
+        """
+        Merges two component labels, keeping the larger one.
+        """
+        self.make_writable()
+        sizes = self.component_sizes
+        if sizes[label] < sizes[other]:
+            label, other = other, label
+        sizes[label] += sizes[other]
+        sizes[other] = 0
+        self.merged[other] = label
+        return label
+
+    def make_writable(self):
+        """
+        Copies the component arrays out of a read-only snapshot mapping.
+        """
+        if isinstance(self.component, memoryview):
+            self.component = array("l", self.component)
+            self.component_sizes = array("l", self.component_sizes)
+
+    def path_ids(self, path):
+        """
+        Converts a list of (movie, person) index pairs into
+        a list of (movie_id, person_id) pairs.
+        """
+        return [(self.movie_ids[movie], self.person_ids[person]) for movie, person in path]
+
+    def nbytes(self):
+        """
+        Returns the number of bytes held by the adjacency arrays.
+        """
+        arrays = (self.person_offsets, self.person_movies,
+                  self.movie_offsets, self.movie_people,
+                  self.component, self.component_sizes)
+        return sum(len(a) * a.itemsize for a in arrays)
+
+
+def build_csr(rows, edge_sources, edge_targets):
+    """
+    Groups edges by source with a counting sort and
+    returns the (offsets, targets) arrays.
+    """
+    offsets = array("l", bytes(array("l").itemsize * (rows + 1)))
+    for source in edge_sources:
+        offsets[source + 1] += 1
+    for i in range(rows):
+        offsets[i + 1] += offsets[i]
+
+    position = array("l", offsets)
+    targets = array("l", bytes(array("l").itemsize * len(edge_targets)))
+    for source, target in zip(edge_sources, edge_targets):
+        targets[position[source]] = target
+        position[source] += 1
+    return offsets, targets
+
+
+def dedupe_csr(offsets, targets):
+    """
+    Sorts every row of a CSR adjacency and drops repeated targets.
+    """
+    new_offsets = array("l", [0])
+    new_targets = array("l")
+    for i in range(len(offsets) - 1):
+        new_targets.extend(sorted(set(targets[offsets[i]:offsets[i + 1]])))
+        new_offsets.append(len(new_targets))
+    return new_offsets, new_targets
+
+
+def transpose_csr(offsets, targets, columns):
+    """
+    Returns the CSR adjacency of the reversed edges.
+    """
+    sources = array("l")
+    for i in range(len(offsets) - 1):
+        sources.extend([i] * (offsets[i + 1] - offsets[i]))
+    return build_csr(columns, targets, sources)
+
+
+def label_components(people, movie_offsets, movie_people):
+    """
+    Unions every movie's stars with a union-find pass and returns
+    (component, sizes): a dense component index per person and
+    the number of people in each component.
+    """
+    parent = array("l", range(people))
+
+    def find(person):
+        while parent[person] != person:
+            parent[person] = parent[parent[person]]
+            person = parent[person]
+        return person
+
+    for movie in range(len(movie_offsets) - 1):
+        start, end = movie_offsets[movie], movie_offsets[movie + 1]
+        if start == end:
+            continue
+        root = find(movie_people[start])
+        for i in range(start + 1, end):
+            other = find(movie_people[i])
+            if other != root:
+                parent[other] = root
+
+    component = array("l", bytes(array("l").itemsize * people))
+    sizes = array("l")
+    labels = {}
+    for person in range(people):
+        root = find(person)
+        label = labels.get(root)
+        if label is None:
+            label = labels[root] = len(sizes)
+            sizes.append(0)
+        component[person] = label
+        sizes[label] += 1
+    return component, sizes
@@ -0,0 +1,52 @@
+import argparse
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate load against server.py")
+    parser.add_argument("pairs", help="file of tab-separated source/target names")
+    parser.add_argument("--url", default="http://127.0.0.1:8050")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--algorithm", default="bfs")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(args.pairs, encoding="utf-8") as f:
+        pairs = [line.rstrip("\n").split("\t") for line in f if line.strip()]
+    rng = random.Random(args.seed)
+    urls = []
+    for _ in range(args.requests):
+        source, target = rng.choice(pairs)
+        query = urlencode({"source": source, "target": target, "algorithm": args.algorithm})
+        urls.append(f"{args.url}/path?{query}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        latencies = sorted(executor.map(timed_get, urls))
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(latencies)} requests in {elapsed:.2f}s, "
+          f"{len(latencies) / elapsed:.1f} requests/s with concurrency {args.concurrency}")
+    for fraction in (0.5, 0.9, 0.99):
+        latency = latencies[min(int(fraction * len(latencies)), len(latencies) - 1)]
+        print(f"p{fraction * 100:g}: {latency * 1000:.2f}ms")
+
+    with urlopen(f"{args.url}/stats") as response:
+        print("Server stats:", json.dumps(json.load(response)["/path"], indent=2))
+
+
+def timed_get(url):
+    start = time.perf_counter()
+    with urlopen(url) as response:
+        response.read()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    main()
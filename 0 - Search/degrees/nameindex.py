@@ -0,0 +1,289 @@
+import bisect
+import sys
+from array import array
+from itertools import islice
+from zlib import crc32
+
+
+# Parts each name is cut into for the fallback fuzzy lookup; at most
+# max_distance of them hold an edit, so max_distance must be below it
+PARTS = 4
+
+# Names of each length checked by edit distance in the fallback fuzzy
+# lookup, sharing the most parts with the name looked up
+CANDIDATES = 20
+
+
+class NameIndex():
+    """
+    Index over lowercase names supporting exact, prefix and fuzzy lookup.
+
+    Prefix lookups bisect a sorted list of names. Fuzzy lookups bisect
+    sorted arrays of hashes, next to arrays of the indices into `keys`
+    of the names they belong to: `deletion_hashes` hold those of every
+    name and of every way of deleting one character from it, and
+    `part_hashes` those of the PARTS parts every name is cut into. The
+    hashes are CRC-32s, which unlike hash() are the same in every
+    process, so the arrays can be saved in the snapshot.
+
+    Names added after the index was built live in the `extra_deletions`
+    and `extra_parts` overlay dictionaries from hash to keys.
+    """
+
+    def __init__(self, names):
+        """
+        Build the index from a dictionary mapping lowercase names
+        to tuples of person_ids. The dictionary is shared, not copied.
+        """
+        self.names = names
+        self.keys = list(names)
+        self.sorted_keys = sorted(self.keys)
+
+        # Sort (hash, key) pairs packed into single ints
+        deletions = []
+        parts = []
+        for key, name in enumerate(self.keys):
+            for variant in deletions_of(name):
+                deletions.append(text_hash(variant) << 32 | key)
+            for i, part in enumerate(parts_of(name)):
+                parts.append(part_hash(part, i, len(name)) << 32 | key)
+        self.deletion_hashes, self.deletion_keys = unpack_sorted(deletions)
+        self.part_hashes, self.part_keys = unpack_sorted(parts)
+        self.extra_deletions = {}
+        self.extra_parts = {}
+
+    @classmethod
+    def from_arrays(cls, names, deletion_hashes, deletion_keys, part_hashes, part_keys):
+        """
+        Build the index directly from previously computed sorted arrays.
+        """
+        index = cls.__new__(cls)
+        index.names = names
+        index.keys = list(names)
+        index.sorted_keys = sorted(index.keys)
+        index.deletion_hashes = deletion_hashes
+        index.deletion_keys = deletion_keys
+        index.part_hashes = part_hashes
+        index.part_keys = part_keys
+        index.extra_deletions = {}
+        index.extra_parts = {}
+        return index
+
+    def add(self, name):
+        """
+        Adds a lowercase name that was just added to the dictionary.
+        """
+        key = len(self.keys)
+        self.keys.append(name)
+        bisect.insort(self.sorted_keys, name)
+        for variant in deletions_of(name):
+            self.extra_deletions.setdefault(text_hash(variant), []).append(key)
+        for i, part in enumerate(parts_of(name)):
+            self.extra_parts.setdefault(part_hash(part, i, len(name)), []).append(key)
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` names starting with a prefix, in order.
+        """
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self.sorted_keys, prefix)
+        matches = []
+        for name in self.sorted_keys[start:start + limit]:
+            if not name.startswith(prefix):
+                break
+            matches.append(name)
+        return matches
+
+    def fuzzy(self, name, limit=10, max_distance=2):
+        """
+        Returns up to `limit` (distance, name) pairs for names within
+        `max_distance` edits of a name, closest first.
+
+        Every name within one edit is found, and so are names further
+        away that one deletion from them brings within reach. Other names
+        are only searched for when none of those is close enough, and then
+        only among the CANDIDATES names of each length sharing the most
+        parts with the name.
+        """
+        name = name.lower()
+
+        # Two names are within d edits only if deleting at most d characters
+        # from each makes them equal. The index holds every name with at
+        # most one character deleted, so looking the name up with up to
+        # max_distance deleted finds every name within one edit, and those
+        # within max_distance needing one deletion of their own, such as
+        # names with two characters swapped
+        variants = {name}
+        edge = {name}
+        for _ in range(max_distance):
+            edge = {shorter for variant in edge for shorter in deletions_of(variant)} - variants
+            variants |= edge
+        found = set()
+        for variant in variants:
+            found.update(lookup(
+                self.deletion_hashes, self.deletion_keys, self.extra_deletions, text_hash(variant)
+            ))
+        matches = self.closest(name, found, max_distance)
+        if matches or max_distance < 2:
+            return matches[:limit]
+
+        # Any other match needs two or more deletions of its own, so it
+        # has at most max_distance - 2 fewer characters. At most
+        # max_distance of its parts hold an edit, and the others appear in
+        # the name shifted by at most max_distance characters
+        found = set()
+        need = PARTS - max_distance
+        for length in range(max(1, len(name) - max_distance + 2), len(name) + max_distance + 1):
+            # levels[k] holds the names having k + 1 parts in common
+            # with the name or more
+            bounds = part_bounds(length)
+            levels = [set() for _ in range(PARTS)]
+            for i in range(PARTS):
+                start, end = bounds[i], bounds[i + 1]
+                keys = set()
+                for shift in range(max(-start, -max_distance), min(len(name) - end, max_distance) + 1):
+                    part = name[start + shift:end + shift]
+                    keys.update(lookup(
+                        self.part_hashes, self.part_keys, self.extra_parts, part_hash(part, i, length)
+                    ))
+                for k in range(i, 0, -1):
+                    levels[k] |= levels[k - 1] & keys
+                levels[0] |= keys
+
+            # Check the names having the most parts in common first
+            picked = set()
+            for level in reversed(levels[need - 1:]):
+                if len(level) > CANDIDATES:
+                    picked.update(islice(level - picked, CANDIDATES - len(picked)))
+                    break
+                picked = level
+            found |= picked
+        return self.closest(name, found, max_distance)[:limit]
+
+    def closest(self, name, found, max_distance):
+        """
+        Returns (distance, name) pairs for the found keys whose names are
+        within `max_distance` edits of a name, closest first.
+        """
+        matches = []
+        for key in found:
+            candidate = self.keys[key]
+            distance = edit_distance(name, candidate, max_distance)
+            if distance <= max_distance:
+                matches.append((distance, candidate))
+        matches.sort()
+        return matches
+
+
+def lookup(hashes, keys, extra, value):
+    """
+    Returns the keys next to a hash value in a sorted array of hashes,
+    and those of its overlay dictionary.
+    """
+    start = bisect.bisect_left(hashes, value)
+    if start < len(hashes) and hashes[start] == value:
+        found = keys[start:bisect.bisect_right(hashes, value, start)]
+    else:
+        found = ()
+    extra = extra.get(value)
+    return found if extra is None else list(found) + extra
+
+
+def unpack_sorted(packed):
+    """
+    Sorts a list of `hash << 32 | key` ints, and returns an array of
+    the hashes and an array of the keys, in that order.
+    """
+    packed.sort()
+    halves = array("i")
+    halves.frombytes(array("q", packed).tobytes())
+    # Little-endian machines store the key, the low half, first
+    low, high = (0, 1) if sys.byteorder == "little" else (1, 0)
+    return halves[high::2], halves[low::2]
+
+
+def text_hash(text):
+    """
+    Returns a 30-bit hash of a string that is the same in every process,
+    small enough to compare quickly while bisecting.
+    """
+    return crc32(text.encode("utf-8")) >> 2
+
+
+def part_hash(part, i, length):
+    """
+    Returns the hash of the i-th part of a name of a given length.
+    """
+    return crc32(part.encode("utf-8"), i << 16 | length) >> 2
+
+
+def deletions_of(name):
+    """
+    Returns the set of a name and the names left by deleting
+    one of its characters.
+    """
+    return {name[:i] + name[i + 1:] for i in range(len(name))} | {name}
+
+
+def part_bounds(length):
+    """
+    Returns the PARTS + 1 offsets cutting a name of a given length
+    into PARTS parts of nearly equal length.
+    """
+    return [length * i // PARTS for i in range(PARTS + 1)]
+
+
+def parts_of(name):
+    """
+    Returns the PARTS parts a name is cut into.
+    """
+    bounds = part_bounds(len(name))
+    return [name[bounds[i]:bounds[i + 1]] for i in range(PARTS)]
+
+
+def edit_distance(a, b, limit):
+    """
+    Returns the Levenshtein distance between two strings,
+    or `limit + 1` if it exceeds `limit`.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    # A common prefix or suffix does not change the distance
+    start = 0
+    end = min(len(a), len(b))
+    while start < end and a[start] == b[start]:
+        start += 1
+    i, j = len(a), len(b)
+    while i > start and j > start and a[i - 1] == b[j - 1]:
+        i -= 1
+        j -= 1
+    a, b = a[start:i], b[start:j]
+    if not a or not b:
+        return min(max(len(a), len(b)), limit + 1)
+
+    # Myers' bit-parallel algorithm over the columns of b: bit i of plus
+    # or minus is set where row i + 1 of the column is one more or one
+    # less than row i, and distance follows the last row
+    matches = {}
+    for i, x in enumerate(a):
+        matches[x] = matches.get(x, 0) | 1 << i
+    mask = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    plus, minus = mask, 0
+    distance = len(a)
+    for y in b:
+        equal = matches.get(y, 0)
+        vertical = equal | minus
+        horizontal = (((equal & plus) + plus) ^ plus) | equal
+        up = minus | ~(horizontal | plus)
+        down = plus & horizontal
+        if up & last:
+            distance += 1
+        elif down & last:
+            distance -= 1
+        up = up << 1 | 1
+        down <<= 1
+        plus = (down | ~(vertical | up)) & mask
+        minus = up & vertical & mask
+    return distance if distance <= limit else limit + 1
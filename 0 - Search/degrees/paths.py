@@ -0,0 +1,117 @@
+import heapq
+import itertools
+
+
+class PathDAG():
+    """
+    Every shortest path between two people, as a layered DAG.
+
+    `parents` maps each person index lying on a shortest path, other
+    than the source, to the (movie, person) pairs one step closer to
+    the source. Paths are produced lazily and never stored up front.
+    """
+
+    def __init__(self, source, target, parents):
+        self.source = source
+        self.target = target
+        self.parents = parents
+
+    @classmethod
+    def build(cls, graph, source, target):
+        """
+        Runs a BFS from the source index that stops after the layer
+        containing the target. Returns None if the target is unreachable.
+        """
+        if source != target and not graph.connected(source, target):
+            return None
+
+        depth = {source: 0}
+        parents = {}
+        layer = [source]
+        while layer and target not in depth:
+            next_layer = []
+            for person in layer:
+                for movie, neighbor in graph.neighbors(person):
+                    seen = depth.get(neighbor)
+                    if seen is None:
+                        depth[neighbor] = depth[person] + 1
+                        parents[neighbor] = [(movie, person)]
+                        next_layer.append(neighbor)
+                    elif seen == depth[person] + 1:
+                        parents[neighbor].append((movie, person))
+            layer = next_layer
+        if target not in depth:
+            return None
+
+        # Keep only the people from which the target can be reached
+        kept = {}
+        stack = [target]
+        while stack:
+            person = stack.pop()
+            if person == source or person in kept:
+                continue
+            kept[person] = parents[person]
+            stack.extend(parent for _, parent in parents[person])
+        return cls(source, target, kept)
+
+    def count(self):
+        """
+        Returns the number of shortest paths without enumerating them.
+        """
+        counts = {self.source: 1}
+
+        def count_to(person):
+            if person not in counts:
+                counts[person] = sum(count_to(parent) for _, parent in self.parents[person])
+            return counts[person]
+
+        return count_to(self.target)
+
+    def paths(self):
+        """
+        Yields every shortest path as a list of (movie, person) index pairs.
+        """
+        suffix = []
+
+        def walk(person):
+            if person == self.source:
+                yield suffix[::-1]
+                return
+            for movie, parent in self.parents[person]:
+                suffix.append((movie, person))
+                yield from walk(parent)
+                suffix.pop()
+
+        return walk(self.target)
+
+    def best_paths(self, weight):
+        """
+        Yields the shortest paths in decreasing order of the total
+        `weight(movie)` of their movies, best first.
+        """
+        # Best total weight of any path from the source to each person
+        best = {self.source: 0}
+
+        def best_to(person):
+            if person not in best:
+                best[person] = max(
+                    best_to(parent) + weight(movie)
+                    for movie, parent in self.parents[person]
+                )
+            return best[person]
+
+        # Best-first search from the target towards the source; since
+        # `best` is exact, paths come off the heap in order
+        counter = itertools.count()
+        heap = [(-best_to(self.target), next(counter), self.target, 0, ())]
+        while heap:
+            _, _, person, score, suffix = heapq.heappop(heap)
+            if person == self.source:
+                yield list(reversed(suffix))
+                continue
+            for movie, parent in self.parents[person]:
+                parent_score = score + weight(movie)
+                heapq.heappush(heap, (
+                    -(parent_score + best_to(parent)), next(counter),
+                    parent, parent_score, suffix + ((movie, person),)
+                ))
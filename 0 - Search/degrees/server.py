@@ -0,0 +1,166 @@
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+
+
+class Histogram():
+    """
+    Thread-safe latency histogram with power-of-two microsecond buckets.
+    """
+
+    def __init__(self, buckets=32):
+        self.counts = [0] * buckets
+        self.total = 0
+        self.seconds = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        bucket = min(int(seconds * 1e6).bit_length(), len(self.counts) - 1)
+        with self.lock:
+            self.counts[bucket] += 1
+            self.total += 1
+            self.seconds += seconds
+
+    def percentile(self, fraction):
+        """
+        Returns the upper bound, in milliseconds, of the bucket
+        holding the given fraction of the recorded requests.
+        """
+        with self.lock:
+            counts = list(self.counts)
+            total = self.total
+        seen = 0
+        for bucket, count in enumerate(counts):
+            seen += count
+            if total and seen >= fraction * total:
+                return (1 << bucket) / 1000
+        return None
+
+    def summary(self):
+        with self.lock:
+            buckets = {
+                f"<{(1 << bucket) / 1000:g}ms": count
+                for bucket, count in enumerate(self.counts) if count
+            }
+            total = self.total
+            mean = self.seconds / total * 1000 if total else None
+        return {
+            "requests": total,
+            "mean_ms": mean,
+            "p50_ms": self.percentile(0.5),
+            "p90_ms": self.percentile(0.9),
+            "p99_ms": self.percentile(0.99),
+            "buckets": buckets,
+        }
+
+
+class Server(ThreadingHTTPServer):
+    """
+    Threading HTTP server with a listen backlog deep enough for many
+    concurrent clients; the default of 5 drops connections, which
+    clients only retry after a second.
+    """
+
+    request_queue_size = 128
+
+
+# Latency histograms per endpoint
+histograms = {"/path": Histogram(), "/person": Histogram()}
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Answers GET /path?source=NAME&target=NAME[&algorithm=bfs],
+    GET /person?name=NAME[&limit=10] and GET /stats with JSON.
+    """
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            if url.path == "/path":
+                status, body = 200, path_query(query)
+            elif url.path == "/person":
+                status, body = 200, person_query(query)
+            elif url.path == "/stats":
+                status, body = 200, {path: h.summary() for path, h in histograms.items()}
+            else:
+                status, body = 404, {"error": "unknown endpoint"}
+        except (KeyError, ValueError) as e:
+            status, body = 400, {"error": f"bad request: {e}"}
+
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        if url.path in histograms and status == 200:
+            histograms[url.path].record(time.perf_counter() - start)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def path_query(query):
+    algorithm = query.get("algorithm", "bfs")
+    if algorithm not in degrees.ALGORITHMS:
+        raise ValueError(f"unknown algorithm '{algorithm}'")
+    return degrees.batch_query(([query["source"], query["target"]], algorithm))
+
+
+def person_query(query):
+    limit = int(query.get("limit", 10))
+    candidates = degrees.candidates_for_name(query["name"], limit=limit)
+    return [
+        {
+            "id": person_id,
+            "name": degrees.people[person_id].name,
+            "birth": degrees.people[person_id].birth,
+        }
+        for person_id in candidates
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve degrees queries over HTTP")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8050)
+    parser.add_argument("--hub", action="append", default=[], metavar="NAME")
+    parser.add_argument("--backlog", type=int, default=Server.request_queue_size,
+                        help="connections waiting to be accepted before new ones are refused")
+    args = parser.parse_args()
+
+    print("Loading data...")
+    degrees.load_data(args.directory)
+    for name in args.hub:
+        person_id = degrees.person_id_for_name(name)
+        if person_id is None:
+            sys.exit(f"Hub '{name}' does not name exactly one person.")
+        degrees.add_hub(person_id)
+        # Load or build the table before serving, rather than in
+        # whichever concurrent requests first need it
+        degrees.distance_table(person_id)
+    print("Data loaded.")
+
+    Server.request_queue_size = args.backlog
+    server = Server((args.host, args.port), Handler)
+    print(f"Serving on http://{args.host}:{server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import json
+import mmap
+import os
+import threading
+from array import array
+
+from graph import StarGraph
+
+
+# Bump whenever the layout of the snapshot changes
+VERSION = 4
+
+MAGIC = b"DEGREES-SNAPSHOT\n"
+FILENAME = "degrees.snapshot"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# Integer arrays of the StarGraph, stored as 64-bit signed integers
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_people",
+          "component", "component_sizes")
+
+# String tables, stored as NUL-separated UTF-8
+STRINGS = ("person_ids", "names", "births", "movie_ids", "titles", "years")
+
+# Arrays of the NameIndex, stored as 32-bit signed integers after
+# a string table of the names they index
+NAME_ARRAYS = ("deletion_hashes", "deletion_keys", "part_hashes", "part_keys")
+
+
+def load(directory):
+    """
+    Maps the snapshot in a dataset directory.
+
+    Returns (person_rows, movie_rows, graph, name_arrays), where the
+    rows are (id, name, birth) and (id, title, year) tuples and
+    name_arrays are the names indexed by the NameIndex followed by its
+    arrays, or None if there is no snapshot or it is out of date.
+    """
+    try:
+        f = open(os.path.join(directory, FILENAME), "rb")
+    except OSError:
+        return None
+    with f:
+        if f.readline() != MAGIC:
+            return None
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            return None
+        if header.get("version") != VERSION or header.get("sources") != source_stats(directory):
+            return None
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    view = memoryview(data)
+    sections = {}
+    for name, (start, length) in header["sections"].items():
+        sections[name] = view[start:start + length]
+    arrays = {name: sections[name].cast("q") for name in ARRAYS}
+    arrays.update({name: sections[name].cast("i") for name in NAME_ARRAYS})
+    strings = {
+        name: str(sections[name], "utf-8").split("\0") if len(sections[name]) else []
+        for name in STRINGS + ("name_keys",)
+    }
+
+    graph = StarGraph.from_arrays(
+        strings["person_ids"], strings["movie_ids"],
+        *(arrays[name] for name in ARRAYS)
+    )
+    person_rows = zip(strings["person_ids"], strings["names"], strings["births"])
+    movie_rows = zip(strings["movie_ids"], strings["titles"], strings["years"])
+    name_arrays = (strings["name_keys"], *(arrays[name] for name in NAME_ARRAYS))
+    return person_rows, movie_rows, graph, name_arrays
+
+
+def save(directory, people, movies, graph, name_index):
+    """
+    Writes a snapshot of the loaded dataset and its name index next
+    to its CSV files.
+    Failing to write it is not an error, the CSVs are simply parsed
+    again next time.
+    """
+    sections = {}
+    for name in ARRAYS:
+        sections[name] = array("q", getattr(graph, name)).tobytes()
+    for name in NAME_ARRAYS:
+        sections[name] = array("i", getattr(name_index, name)).tobytes()
+    tables = {
+        "person_ids": people.keys(),
+        "names": (person.name for person in people.values()),
+        "births": (person.birth for person in people.values()),
+        "movie_ids": movies.keys(),
+        "titles": (movie.title for movie in movies.values()),
+        "years": (movie.year for movie in movies.values()),
+        "name_keys": name_index.keys,
+    }
+    for name, values in tables.items():
+        sections[name] = "\0".join(values).encode("utf-8")
+
+    # Lay sections out after a fixed size header, aligned for casting
+    header_size = 4096
+    while True:
+        layout = {}
+        offset = header_size
+        for name, section in sections.items():
+            layout[name] = (offset, len(section))
+            offset += len(section) + (-len(section) % 8)
+        header = json.dumps({
+            "version": VERSION,
+            "sources": source_stats(directory),
+            "sections": layout,
+        }).encode("utf-8") + b"\n"
+        if len(MAGIC) + len(header) <= header_size:
+            break
+        header_size *= 2
+
+    chunks = [MAGIC + header, bytes(header_size - len(MAGIC) - len(header))]
+    for section in sections.values():
+        chunks += [section, bytes(-len(section) % 8)]
+    write_atomically(os.path.join(directory, FILENAME), chunks)
+
+
+def write_atomically(path, chunks):
+    """
+    Writes chunks of bytes to a file through a temporary file that
+    replaces it once complete, so no reader sees a partial file.
+    Failing to write it is not an error, the file is left as it was.
+    The temporary file is named after the process and thread, so
+    concurrent writers of the same file do not write over each other.
+    """
+    temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(temporary, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(temporary, path)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+
+
+def source_stats(directory, missing_ok=False):
+    """
+    Returns the size and modification time of every CSV file,
+    used to tell whether a snapshot is still valid. Missing files
+    are recorded as None if `missing_ok` is set.
+    """
+    stats = {}
+    for name in SOURCES:
+        try:
+            stat = os.stat(os.path.join(directory, name))
+        except FileNotFoundError:
+            if not missing_ok:
+                raise
+            stats[name] = None
+            continue
+        stats[name] = [stat.st_size, stat.st_mtime_ns]
+    return stats
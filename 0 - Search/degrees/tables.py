@@ -0,0 +1,120 @@
+import json
+from array import array
+
+import snapshot
+
+
+# Bump whenever the layout of a table file changes
+VERSION = 1
+
+MAGIC = b"DEGREES-BFS-TABLE\n"
+
+
+class DistanceTable():
+    """
+    Result of a single breadth-first search from one source person.
+
+    For every person index, `distance` holds the number of degrees from
+    the source (-1 if unreachable) and `parent` and `movie` hold the
+    previous person and the shared movie on one shortest path back to
+    the source.
+    """
+
+    def __init__(self, source, distance, parent, movie):
+        self.source = source
+        self.distance = distance
+        self.parent = parent
+        self.movie = movie
+
+    @classmethod
+    def build(cls, graph, source):
+        """
+        Runs a BFS over the whole component of a source person index.
+        """
+        size = len(graph.person_ids)
+        distance = array("i", [-1]) * size
+        parent = array("i", [-1]) * size
+        movie = array("i", [-1]) * size
+
+        distance[source] = 0
+        layer = [source]
+        depth = 0
+        while layer:
+            depth += 1
+            next_layer = []
+            for person in layer:
+                for shared, neighbor in graph.neighbors(person):
+                    if distance[neighbor] == -1:
+                        distance[neighbor] = depth
+                        parent[neighbor] = person
+                        movie[neighbor] = shared
+                        next_layer.append(neighbor)
+            layer = next_layer
+        return cls(source, distance, parent, movie)
+
+    def path_to(self, target):
+        """
+        Returns the list of (movie, person) index pairs from
+        the source to a target person index, or None if unreachable.
+        """
+        if target >= len(self.distance) or self.distance[target] == -1:
+            return None
+        path = []
+        while target != self.source:
+            path.append((self.movie[target], target))
+            target = self.parent[target]
+        path.reverse()
+        return path
+
+    def save(self, filename, stats):
+        """
+        Writes the table to a file, tagged with the dataset's
+        source file stats so stale tables can be detected.
+        """
+        header = json.dumps({
+            "version": VERSION,
+            "source": self.source,
+            "size": len(self.distance),
+            "itemsize": self.distance.itemsize,
+            "sources": stats,
+        }).encode("utf-8") + b"\n"
+        snapshot.write_atomically(filename, (MAGIC + header, self.distance, self.parent, self.movie))
+
+    @classmethod
+    def load(cls, filename, stats):
+        """
+        Reads a table written by save, or returns None if it is
+        missing or was computed from different source files.
+        """
+        try:
+            f = open(filename, "rb")
+        except OSError:
+            return None
+        with f:
+            if f.readline() != MAGIC:
+                return None
+            try:
+                header = json.loads(f.readline())
+            except ValueError:
+                return None
+            if (header.get("version") != VERSION or header.get("sources") != stats
+                    or header.get("itemsize") != array("i").itemsize):
+                return None
+            columns = []
+            for _ in range(3):
+                values = array("i")
+                try:
+                    values.fromfile(f, header["size"])
+                except EOFError:
+                    return None
+                columns.append(values)
+        return cls(header["source"], *columns)
+
+
+def reverse_path(path, start):
+    """
+    Reverses a list of (movie, person) pairs that leads away from
+    `start`, so that it leads from its last person back to `start`.
+    """
+    people = [start] + [person for _, person in path]
+    return [(path[i][0], people[i]) for i in range(len(path) - 1, -1, -1)]
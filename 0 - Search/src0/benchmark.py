@@ -0,0 +1,124 @@
+import argparse
+import contextlib
+import csv
+import os
+import tempfile
+import time
+import tracemalloc
+
+from generate import STYLES, generate
+from maze import Maze, STRATEGIES
+
+
+# Columns of the CSV written by the benchmark
+FIELDS = ("style", "size", "seed", "strategy", "solved", "explored", "length", "seconds", "peak_kib")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark maze solvers over generated mazes")
+    parser.add_argument("--styles", nargs="+", choices=STYLES, default=list(STYLES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[64, 128, 256, 512],
+                        help="side lengths of the square mazes")
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=list(STRATEGIES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", default="benchmark.csv")
+    parser.add_argument("--render", type=int, metavar="SIZE",
+                        help="time drawing a solved SIZE x SIZE maze instead of solving")
+    args = parser.parse_args()
+
+    if args.render:
+        benchmark_render(args.render, args.seed)
+        return
+
+    with open(args.output, "w", newline="") as f:
+        writer = csv.DictWriter(f, FIELDS)
+        writer.writeheader()
+        for row in benchmark(args.styles, args.sizes, args.strategies, args.seed):
+            writer.writerow(row)
+            f.flush()
+            print(f"{row['style']:>12} {row['size']:>6} {row['strategy']:>14}: "
+                  f"{row['explored']:>9} explored, {row['seconds'] * 1000:>10.2f}ms, "
+                  f"{row['peak_kib']:>10.1f} KiB", flush=True)
+    print(f"Wrote {args.output}")
+
+
+def benchmark(styles, sizes, strategies, seed=0):
+    """
+    Generates one square maze per style and size from a seed and solves
+    it with every strategy, yielding one row of measurements per solve.
+    """
+    # Import NumPy up front so the first wavefront solve does not pay for it
+    if "wavefront" in strategies:
+        import numpy  # noqa: F401
+
+    with tempfile.TemporaryDirectory() as directory:
+        for style in styles:
+            for size in sizes:
+                filename = os.path.join(directory, f"{style}-{size}.txt")
+                with open(filename, "w") as f:
+                    f.write(generate(style, size, size, seed))
+                maze = Maze(filename)
+                for strategy in strategies:
+                    row = measure(maze, strategy)
+                    row.update(style=style, size=size, seed=seed)
+                    yield row
+
+
+def benchmark_render(size, seed=0):
+    """
+    Times printing a solved square open field maze and drawing it as an
+    image with 4px cells, printing to a null device so the terminal does
+    not slow it down.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "maze.txt")
+        with open(filename, "w") as f:
+            f.write(generate("open", size, size, seed))
+        maze = Maze(filename)
+        maze.solve("bfs")
+        print(f"Solved {size}x{size} maze with BFS in {maze.solve_time:.3f}s")
+
+        start = time.perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            maze.print()
+        print(f"print:        {time.perf_counter() - start:.3f}s")
+
+        start = time.perf_counter()
+        maze.output_image(os.path.join(directory, "maze.png"), show_explored=True,
+                          cell_size=4, cell_border=1)
+        print(f"output_image: {time.perf_counter() - start:.3f}s")
+
+
+def measure(maze, strategy):
+    """
+    Solves a maze twice with a strategy: once for time and states
+    explored, and once under tracemalloc for the peak memory allocated
+    while solving, since tracing slows allocations down.
+    """
+    try:
+        maze.solve(strategy)
+        solved = True
+    except Exception:
+        solved = False
+    row = {
+        "strategy": strategy,
+        "solved": solved,
+        "explored": maze.num_explored,
+        "length": len(maze.solution[1]) if solved else None,
+        "seconds": maze.solve_time,
+    }
+
+    tracemalloc.start()
+    try:
+        maze.solve(strategy)
+    except Exception:
+        pass
+    finally:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    row["peak_kib"] = peak / 1024
+    return row
+
+
+if __name__ == "__main__":
+    main()
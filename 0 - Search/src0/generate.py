@@ -0,0 +1,157 @@
+import argparse
+import random
+import sys
+
+
+# Steps between neighboring cells of a generated maze
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a maze file")
+    parser.add_argument("style", choices=STYLES)
+    parser.add_argument("height", type=int)
+    parser.add_argument("width", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--density", type=float, default=0.25,
+                        help="fraction of walls in an open field")
+    parser.add_argument("-o", "--output", help="file to write instead of stdout")
+    args = parser.parse_args()
+
+    try:
+        text = generate(args.style, args.height, args.width, args.seed, args.density)
+    except ValueError as e:
+        sys.exit(str(e))
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+
+
+def generate(style, height, width, seed=0, density=0.25):
+    """
+    Returns the text of a maze file of the given size and style, with
+    the start at the top left and the goal at the bottom right. The
+    same seed always produces the same maze.
+    """
+    if style not in STYLES:
+        raise ValueError(f"unknown style '{style}'")
+    if height < 1 or width < 1:
+        raise ValueError("maze must have at least one row and column")
+    rng = random.Random(seed)
+    if style == "open":
+        grid, goal = open_field(height, width, rng, density)
+    else:
+        grid, goal = STYLES[style](height, width, rng)
+    if goal == 0:
+        raise ValueError("maze is too small for a start and a goal")
+    grid[0] = ord("A")
+    grid[goal] = ord("B")
+    rows = [grid[i * width:(i + 1) * width] for i in range(height)]
+    return b"\n".join(rows).decode("ascii") + "\n"
+
+
+def backtracker(height, width, rng):
+    """
+    Carves a perfect maze by a depth-first walk that backs up whenever
+    it gets stuck. Cells sit on even rows and columns, with the walls
+    between them on odd ones. Returns the grid and the goal index.
+    """
+    grid, rows, cols = cell_grid(height, width)
+    carved = bytearray(rows * cols)
+    carved[0] = 1
+    stack = [(0, 0)]
+    while stack:
+        i, j = stack[-1]
+        options = [
+            (i + di, j + dj) for di, dj in DIRECTIONS
+            if 0 <= i + di < rows and 0 <= j + dj < cols and not carved[(i + di) * cols + j + dj]
+        ]
+        if not options:
+            stack.pop()
+            continue
+        ni, nj = rng.choice(options)
+        carved[ni * cols + nj] = 1
+        grid[(i + ni) * width + j + nj] = ord(" ")
+        stack.append((ni, nj))
+    return grid, 2 * (rows - 1) * width + 2 * (cols - 1)
+
+
+def prim(height, width, rng):
+    """
+    Carves a perfect maze with randomized Prim's algorithm, growing the
+    maze from the start through a random passage out of it each step.
+    Cells sit on even rows and columns. Returns the grid and the goal index.
+    """
+    grid, rows, cols = cell_grid(height, width)
+    carved = bytearray(rows * cols)
+    passages = []
+
+    def add(i, j):
+        carved[i * cols + j] = 1
+        for di, dj in DIRECTIONS:
+            if 0 <= i + di < rows and 0 <= j + dj < cols and not carved[(i + di) * cols + j + dj]:
+                passages.append((i, j, i + di, j + dj))
+
+    add(0, 0)
+    while passages:
+        # Remove a random passage by swapping it with the last one
+        k = rng.randrange(len(passages))
+        passages[k], passages[-1] = passages[-1], passages[k]
+        i, j, ni, nj = passages.pop()
+        if carved[ni * cols + nj]:
+            continue
+        grid[(i + ni) * width + j + nj] = ord(" ")
+        add(ni, nj)
+    return grid, 2 * (rows - 1) * width + 2 * (cols - 1)
+
+
+def open_field(height, width, rng, density):
+    """
+    Scatters single-cell obstacles over an open field, sparing a random
+    staircase from the start to the goal so the maze is always solvable.
+    Returns the grid and the goal index.
+    """
+    if not 0 <= density < 1:
+        raise ValueError("density must be at least 0 and below 1")
+    grid = bytearray(b" " * (height * width))
+    spared = bytearray(height * width)
+    i = j = 0
+    while True:
+        spared[i * width + j] = 1
+        if (i, j) == (height - 1, width - 1):
+            break
+        if j == width - 1 or (i < height - 1 and rng.random() < 0.5):
+            i += 1
+        else:
+            j += 1
+    for cell in range(height * width):
+        if not spared[cell] and rng.random() < density:
+            grid[cell] = ord("#")
+    return grid, height * width - 1
+
+
+def cell_grid(height, width):
+    """
+    Returns a grid of walls with every cell on an even row and column
+    carved out, and the number of rows and columns of those cells.
+    """
+    grid = bytearray(b"#" * (height * width))
+    rows, cols = (height + 1) // 2, (width + 1) // 2
+    for i in range(rows):
+        for j in range(cols):
+            grid[2 * i * width + 2 * j] = ord(" ")
+    return grid, rows, cols
+
+
+# Maze generators by style
+STYLES = {
+    "backtracker": backtracker,
+    "prim": prim,
+    "open": open_field,
+}
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,66 @@
+import argparse
+import csv
+import heapq
+import itertools
+import multiprocessing
+import operator
+import os
 import sys
+import time
+from array import array
 
-class Node():
-    def __init__(self, state, parent, action):
-        self.state = state
-        self.parent = parent
-        self.action = action
 
+# Strategies accepted by Maze.solve
+STRATEGIES = ("dfs", "bfs", "greedy", "astar", "bidirectional", "wavefront", "jps")
 
-class StackFrontier():
-    def __init__(self):
-        self.frontier = []
+# Moves in the order neighbors are generated
+ACTIONS = ("up", "down", "left", "right")
 
-    def add(self, node):
-        self.frontier.append(node)
+# Moves jump point search tries after arriving by each move, and from the start
+JUMPS = ((0, 2, 3), (1, 2, 3), (2, 0, 1), (3, 0, 1), (0, 1, 2, 3))
 
-    def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+# Maps every byte of a maze file to 1 for a wall, 0 for an open cell
+WALL_TABLE = bytes(0 if chr(i) in " AB" else 1 for i in range(256))
 
-    def empty(self):
-        return len(self.frontier) == 0
+# Search state of a cell
+UNSEEN = 0
+FRONTIER = 1
+EXPLORED = 2
 
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
-            return node
+# Drawing state of a cell; walls and explored cells match their grid
+# and search state values so both can be combined byte by byte
+CELL_EMPTY = 0
+CELL_WALL = 1
+CELL_EXPLORED = 2
+CELL_SOLUTION = 3
+CELL_START = 4
+CELL_GOAL = 5
 
+# Keeps only EXPLORED marks from search states
+EXPLORED_TABLE = bytes(CELL_EXPLORED if i == EXPLORED else CELL_EMPTY for i in range(256))
 
-class QueueFrontier(StackFrontier):
+# Characters and colors used to draw each drawing state
+GLYPHS = {CELL_EMPTY: " ", CELL_WALL: "█", CELL_EXPLORED: " ", CELL_SOLUTION: "*", CELL_START: "A", CELL_GOAL: "B"}
+COLORS = (
+    (237, 240, 252),
+    (40, 40, 40),
+    (212, 97, 85),
+    (220, 235, 113),
+    (255, 0, 0),
+    (0, 171, 28),
+)
 
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
-            return node
 
 class Maze():
+    """
+    Maze read from a text file.
+
+    Walls are kept in a flat bytearray, one byte per cell, surrounded by
+    a border of walls so moves never need bounds checks. Cells are
+    addressed by their integer index into it, and the four moves by
+    precomputed index offsets. States passed in and out of the public
+    methods are still (row, col) tuples.
+    """
 
     def __init__(self, filename):
 
@@ -58,172 +79,587 @@ class Maze():
         self.height = len(contents)
         self.width = max(len(line) for line in contents)
 
-        # Keep track of walls
-        self.walls = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                try:
-                    if contents[i][j] == "A":
-                        self.start = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == "B":
-                        self.goal = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == " ":
-                        row.append(False)
-                    else:
-                        row.append(True)
-                except IndexError:
-                    row.append(False)
-            self.walls.append(row)
+        # Keep track of walls, with a border of walls around the maze
+        self.stride = self.width + 2
+        border = b"#" * self.stride
+        rows = [border]
+        for i, line in enumerate(contents):
+            if "A" in line:
+                self.start = (i, line.index("A"))
+            if "B" in line:
+                self.goal = (i, line.index("B"))
+            rows.append(b"#" + line.ljust(self.width).encode("latin-1", "replace") + b"#")
+        rows.append(border)
+        self.grid = bytearray(b"".join(rows).translate(WALL_TABLE))
+        self.offsets = (-self.stride, self.stride, -1, 1)
 
         self.solution = None
+        self.visited = None
 
 
-    def print(self):
-        solution = self.solution[1] if self.solution is not None else None
-        print()
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-                if col:
-                    print("█", end="")
-                elif (i, j) == self.start:
-                    print("A", end="")
-                elif (i, j) == self.goal:
-                    print("B", end="")
-                elif solution is not None and (i, j) in solution:
-                    print("*", end="")
-                else:
-                    print(" ", end="")
-            print()
-        print()
+    def cell(self, state):
+        """Returns the grid index of a (row, col) state."""
+        return (state[0] + 1) * self.stride + state[1] + 1
 
 
-    def neighbors(self, state):
-        row, col = state
-        candidates = [
-            ("up", (row - 1, col)),
-            ("down", (row + 1, col)),
-            ("left", (row, col - 1)),
-            ("right", (row, col + 1))
+    def state(self, cell):
+        """Returns the (row, col) state of a grid index."""
+        row, col = divmod(cell, self.stride)
+        return (row - 1, col - 1)
+
+
+    @property
+    def walls(self):
+        """Walls as a list of rows of booleans."""
+        return [
+            [bool(wall) for wall in self.grid[self.cell((i, 0)):self.cell((i, self.width))]]
+            for i in range(self.height)
         ]
 
+
+    @property
+    def explored(self):
+        """Set of states explored by the last solve."""
+        if self.visited is None:
+            return set()
+        return {self.state(cell) for cell, mark in enumerate(self.visited) if mark == EXPLORED}
+
+
+    def cell_states(self, show_solution=True, show_explored=False):
+        """
+        Returns a bytearray holding the drawing state of every grid index.
+        The solution and explored cells are only shown once solved.
+        """
+        states = bytearray(self.grid)
+        if self.solution is None:
+            show_solution = show_explored = False
+        if show_explored and self.visited is not None:
+            states = bytearray(map(operator.or_, states, self.visited.translate(EXPLORED_TABLE)))
+        if show_solution:
+            for state in self.solution[1]:
+                states[self.cell(state)] = CELL_SOLUTION
+        states[self.cell(self.start)] = CELL_START
+        states[self.cell(self.goal)] = CELL_GOAL
+        return states
+
+
+    def print(self):
+        text = self.cell_states().decode("latin-1").translate(GLYPHS)
+        rows = [text[self.cell((i, 0)):self.cell((i, self.width))] for i in range(self.height)]
+        sys.stdout.write("\n" + "".join(row + "\n" for row in rows) + "\n")
+
+
+    def neighbors(self, state):
+        cell = self.cell(state)
         result = []
-        for action, (r, c) in candidates:
-            if 0 <= r < self.height and 0 <= c < self.width and not self.walls[r][c]:
-                result.append((action, (r, c)))
+        for action, offset in zip(ACTIONS, self.offsets):
+            if not self.grid[cell + offset]:
+                result.append((action, self.state(cell + offset)))
         return result
 
 
-    def solve(self):
-        """Finds a solution to maze, if one exists."""
+    def manhattan(self, cell):
+        """Returns the Manhattan distance from a cell to the goal."""
+        row, col = divmod(cell, self.stride)
+        return abs(row - 1 - self.goal[0]) + abs(col - 1 - self.goal[1])
+
+
+    def solve(self, strategy="dfs"):
+        """
+        Finds a solution to maze, if one exists, using one of STRATEGIES:
+        depth-first, breadth-first, greedy best-first or A* search with a
+        Manhattan distance heuristic, breadth-first search from both ends,
+        a vectorized breadth-first flood fill of the whole maze, or A*
+        search over jump points.
+        """
+        if strategy not in STRATEGIES:
+            raise Exception(f"unknown strategy '{strategy}'")
 
         # Keep track of number of states explored
         self.num_explored = 0
+        self.solution = None
 
-        # Initialize frontier to just the starting position
-        start = Node(state=self.start, parent=None, action=None)
-        frontier = StackFrontier()
-        frontier.add(start)
+        # Mark every cell UNSEEN, FRONTIER or EXPLORED, and record the
+        # index of the move that reached it
+        self.visited = bytearray(len(self.grid))
+        moves = bytearray(len(self.grid))
+
+        started = time.perf_counter()
+        try:
+            if strategy == "dfs":
+                self.search(moves, queue=False)
+            elif strategy == "bfs":
+                self.search(moves, queue=True)
+            elif strategy == "greedy":
+                self.search_informed(moves, astar=False)
+            elif strategy == "astar":
+                self.search_informed(moves, astar=True)
+            elif strategy == "wavefront":
+                self.solve_wavefront()
+            elif strategy == "jps":
+                self.search_jump_points(moves)
+            else:
+                self.solve_bidirectional(moves)
+        finally:
+            self.solve_time = time.perf_counter() - started
+
+
+    def search(self, moves, queue):
+        """
+        Depth-first search, or breadth-first search if `queue` is set.
+        The frontier is an array of cell indices used as a stack or a queue.
+        """
+        grid, visited, offsets = self.grid, self.visited, self.offsets
+        start, goal = self.cell(self.start), self.cell(self.goal)
 
-        # Initialize an empty explored set
-        self.explored = set()
+        # Initialize frontier to just the starting position
+        frontier = array("l", [start])
+        head = 0
+        visited[start] = FRONTIER
 
         # Keep looping until solution found
         while True:
 
             # If nothing left in frontier, then no path
-            if frontier.empty():
+            if head == len(frontier):
                 raise Exception("no solution")
 
-            # Choose a node from the frontier
-            node = frontier.remove()
+            # Choose a cell from the frontier
+            if queue:
+                cell = frontier[head]
+                head += 1
+            else:
+                cell = frontier.pop()
             self.num_explored += 1
 
-            # If node is the goal, then we have a solution
-            if node.state == self.goal:
-                actions = []
-                cells = []
-                while node.parent is not None:
-                    actions.append(node.action)
-                    cells.append(node.state)
-                    node = node.parent
-                actions.reverse()
-                cells.reverse()
-                self.solution = (actions, cells)
+            # If cell is the goal, then we have a solution
+            if cell == goal:
+                self.solution = self.trace(moves, start, goal)
                 return
 
-            # Mark node as explored
-            self.explored.add(node.state)
+            # Mark cell as explored
+            visited[cell] = EXPLORED
 
             # Add neighbors to frontier
-            for action, state in self.neighbors(node.state):
-                if not frontier.contains_state(state) and state not in self.explored:
-                    child = Node(state=state, parent=node, action=action)
-                    frontier.add(child)
-
-
-    def output_image(self, filename, show_solution=True, show_explored=False):
-        from PIL import Image, ImageDraw
-        cell_size = 50
-        cell_border = 2
-
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.width * cell_size, self.height * cell_size),
-            "black"
-        )
-        draw = ImageDraw.Draw(img)
-
-        solution = self.solution[1] if self.solution is not None else None
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-
-                # Walls
-                if col:
-                    fill = (40, 40, 40)
-
-                # Start
-                elif (i, j) == self.start:
-                    fill = (255, 0, 0)
-
-                # Goal
-                elif (i, j) == self.goal:
-                    fill = (0, 171, 28)
-
-                # Solution
-                elif solution is not None and show_solution and (i, j) in solution:
-                    fill = (220, 235, 113)
+            for move, offset in enumerate(offsets):
+                neighbor = cell + offset
+                if grid[neighbor] or visited[neighbor]:
+                    continue
+                visited[neighbor] = FRONTIER
+                moves[neighbor] = move
+                frontier.append(neighbor)
+
+
+    def search_informed(self, moves, astar):
+        """
+        Greedy best-first search by Manhattan distance to the goal,
+        or A* search if `astar` is set, over a heap of cell indices.
+        """
+        grid, visited, offsets = self.grid, self.visited, self.offsets
+        start, goal = self.cell(self.start), self.cell(self.goal)
+
+        # Keep track of path cost from the start to each cell
+        costs = array("l", [0]) * len(grid)
+
+        # Heap entries are (priority, insertion order, cell, move into cell);
+        # a cell is pushed again when a cheaper path to it is found
+        counter = itertools.count()
+        frontier = [(self.manhattan(start), next(counter), start, 0)]
+        visited[start] = FRONTIER
+
+        while frontier:
+            _, _, cell, move = heapq.heappop(frontier)
+            if visited[cell] == EXPLORED:
+                continue
+            moves[cell] = move
+            self.num_explored += 1
 
-                # Explored
-                elif solution is not None and show_explored and (i, j) in self.explored:
-                    fill = (212, 97, 85)
+            if cell == goal:
+                self.solution = self.trace(moves, start, goal)
+                return
 
-                # Empty cell
-                else:
-                    fill = (237, 240, 252)
+            visited[cell] = EXPLORED
+            cost = costs[cell] + 1
+            for move, offset in enumerate(offsets):
+                neighbor = cell + offset
+                if grid[neighbor] or visited[neighbor] == EXPLORED:
+                    continue
+                if visited[neighbor] == FRONTIER and cost >= costs[neighbor]:
+                    continue
+                visited[neighbor] = FRONTIER
+                costs[neighbor] = cost
+                priority = self.manhattan(neighbor) + (cost if astar else 0)
+                heapq.heappush(frontier, (priority, next(counter), neighbor, move))
+
+        raise Exception("no solution")
+
+
+    def search_jump_points(self, moves):
+        """
+        A* search that only expands jump points: cells where a straight
+        run has to stop because a side opening appears next to a wall,
+        plus, on vertical runs, cells from which a sideways run finds one.
+        Skipping the cells between them keeps paths optimal while cutting
+        out the many equivalent orderings of the same moves.
+        """
+        visited = self.visited
+        start, goal = self.cell(self.start), self.cell(self.goal)
+
+        # Keep track of path cost to each jump point and the jump point before it
+        costs = array("l", [0]) * len(self.grid)
+        parents = array("l", [0]) * len(self.grid)
+
+        # Heap entries are (priority, negated cost, cell, move into cell,
+        # previous jump point), so that among equally promising jump points
+        # the one furthest along is expanded first; the start has no move into it
+        frontier = [(self.manhattan(start), 0, start, len(JUMPS) - 1, start)]
+        visited[start] = FRONTIER
+
+        while frontier:
+            _, _, cell, move, parent = heapq.heappop(frontier)
+            if visited[cell] == EXPLORED:
+                continue
+            moves[cell] = move
+            parents[cell] = parent
+            self.num_explored += 1
 
-                # Draw cell
-                draw.rectangle(
-                    ([(j * cell_size + cell_border, i * cell_size + cell_border),
-                      ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
-                    fill=fill
-                )
+            if cell == goal:
+                self.solution = self.trace_jumps(moves, parents, start, goal)
+                return
 
+            visited[cell] = EXPLORED
+            for move in JUMPS[move]:
+                offset = self.offsets[move]
+                jump_point = self.jump(cell, move, goal)
+                if jump_point is None or visited[jump_point] == EXPLORED:
+                    continue
+                cost = costs[cell] + (jump_point - cell) // offset
+                if visited[jump_point] == FRONTIER and cost >= costs[jump_point]:
+                    continue
+                visited[jump_point] = FRONTIER
+                costs[jump_point] = cost
+                priority = cost + self.manhattan(jump_point)
+                heapq.heappush(frontier, (priority, -cost, jump_point, move, cell))
+
+        raise Exception("no solution")
+
+
+    def jump(self, cell, move, goal):
+        """
+        Runs straight from a cell by a move and returns the first jump
+        point reached, or None if a wall comes first.
+        """
+        grid = self.grid
+        offset = self.offsets[move]
+        side = 1 if move < 2 else self.stride
+        while True:
+            cell += offset
+            if grid[cell]:
+                return None
+            if cell == goal:
+                return cell
+
+            # An opening to the side that was walled off one step back
+            if (not grid[cell - side] and grid[cell - offset - side]) or \
+                    (not grid[cell + side] and grid[cell - offset + side]):
+                return cell
+
+            # A vertical run also stops where a sideways run would
+            if move < 2 and (self.jump(cell, 2, goal) is not None or self.jump(cell, 3, goal) is not None):
+                return cell
+
+
+    def trace_jumps(self, moves, parents, start, cell):
+        """
+        Follows jump points back from a cell to the start, filling in
+        the straight runs between them, and returns the (actions, cells)
+        solution leading to it.
+        """
+        actions = []
+        cells = []
+        while cell != start:
+            move, parent = moves[cell], parents[cell]
+            while cell != parent:
+                actions.append(ACTIONS[move])
+                cells.append(self.state(cell))
+                cell -= self.offsets[move]
+        actions.reverse()
+        cells.reverse()
+        return actions, cells
+
+
+    def solve_bidirectional(self, moves):
+        """
+        Searches breadth-first from the start and the goal at the same time,
+        growing the smaller side one layer at a time, until they meet.
+        """
+        start, goal = self.cell(self.start), self.cell(self.goal)
+
+        # Cells reached by each side, and the moves that reached them
+        forward = bytearray(len(self.grid))
+        backward = bytearray(len(self.grid))
+        backward_moves = bytearray(len(self.grid))
+        forward[start] = backward[goal] = 1
+        forward_layer = [start]
+        backward_layer = [goal]
+
+        meeting = start if start == goal else None
+        while meeting is None:
+            if not forward_layer or not backward_layer:
+                raise Exception("no solution")
+            if len(forward_layer) <= len(backward_layer):
+                forward_layer, meeting = self.expand_layer(forward_layer, forward, moves, backward)
+            else:
+                backward_layer, meeting = self.expand_layer(backward_layer, backward, backward_moves, forward)
+
+        # Follow moves back to the start, then forward to the goal
+        actions, cells = self.trace(moves, start, meeting)
+        cell = meeting
+        while cell != goal:
+            move = backward_moves[cell]
+            cell -= self.offsets[move]
+            actions.append(ACTIONS[move ^ 1])
+            cells.append(self.state(cell))
+        self.solution = (actions, cells)
+
+
+    def expand_layer(self, layer, reached, moves, other):
+        """
+        Expands one BFS layer of one side of a bidirectional search.
+        Returns the next layer and a cell also reached by the other
+        side, or None if the sides have not met.
+        """
+        grid, offsets = self.grid, self.offsets
+        next_layer = []
+        for cell in layer:
+            self.num_explored += 1
+            self.visited[cell] = EXPLORED
+            for move, offset in enumerate(offsets):
+                neighbor = cell + offset
+                if grid[neighbor] or reached[neighbor]:
+                    continue
+                reached[neighbor] = 1
+                moves[neighbor] = move
+                if other[neighbor]:
+                    return next_layer, neighbor
+                next_layer.append(neighbor)
+        return next_layer, None
+
+
+    def solve_wavefront(self):
+        """
+        Breadth-first flood fill with NumPy: each step expands the whole
+        frontier at once, shifting its array of cell indices by every move
+        offset and masking out walls and reached cells. Fills `distances`
+        with the number of moves from the start to every cell (-1 for
+        walls and unreachable cells), then recovers a shortest path by
+        walking down the distances from the goal.
+        """
+        import numpy as np
+        unseen = np.frombuffer(self.grid, dtype=np.uint8) == 0
+        distances = np.full(len(self.grid), -1, dtype=np.int32)
+        offsets = np.array(self.offsets)
+
+        start = self.cell(self.start)
+        distances[start] = 0
+        unseen[start] = False
+        frontier = np.array([start])
+        step = 0
+        while len(frontier):
+            step += 1
+            candidates = (frontier[:, None] + offsets).ravel()
+            candidates = candidates[unseen[candidates]]
+            unseen[candidates] = False
+            distances[candidates] = step
+
+            # A cell next to several frontier cells was found more than once
+            frontier = np.unique(candidates)
+
+        reached = distances >= 0
+        self.num_explored = int(np.count_nonzero(reached))
+        self.visited = bytearray(reached.astype(np.uint8) * EXPLORED)
+        self.distances = distances.reshape(self.height + 2, self.stride)[1:-1, 1:-1]
+
+        # Walk back from the goal, always to a cell one move closer
+        cell = self.cell(self.goal)
+        distance = int(distances[cell])
+        if distance < 0:
+            raise Exception("no solution")
+        actions = []
+        cells = []
+        while cell != start:
+            distance -= 1
+            for move, offset in enumerate(self.offsets):
+                if distances[cell - offset] == distance:
+                    break
+            actions.append(ACTIONS[move])
+            cells.append(self.state(cell))
+            cell -= offset
+        actions.reverse()
+        cells.reverse()
+        self.solution = (actions, cells)
+
+
+    def trace(self, moves, start, cell):
+        """
+        Follows recorded moves back from a cell to the start and
+        returns the (actions, cells) solution leading to it.
+        """
+        actions = []
+        cells = []
+        while cell != start:
+            move = moves[cell]
+            actions.append(ACTIONS[move])
+            cells.append(self.state(cell))
+            cell -= self.offsets[move]
+        actions.reverse()
+        cells.reverse()
+        return actions, cells
+
+
+    def output_image(self, filename, show_solution=True, show_explored=False,
+                     cell_size=50, cell_border=2):
+        """
+        Draws the maze as an image with one square per cell, by coloring
+        an array of cells and scaling it up to squares in one step.
+        """
+        import numpy as np
+        from PIL import Image
+
+        # Color of every cell, without the wall border
+        states = np.frombuffer(self.cell_states(show_solution, show_explored), dtype=np.uint8)
+        states = states.reshape(self.height + 2, self.stride)[1:-1, 1:-1]
+        colors = np.array(COLORS, dtype=np.uint8)[states]
+
+        # Every cell becomes a square, black outside the inner part
+        offsets = np.arange(cell_size)
+        inside = (offsets >= cell_border) & (offsets <= cell_size - cell_border)
+        square = inside[:, None] & inside[None, :]
+        pixels = colors[:, None, :, None, :] * square[None, :, None, :, None]
+
+        img = Image.fromarray(
+            pixels.reshape(self.height * cell_size, self.width * cell_size, 3), "RGB"
+        )
         img.save(filename)
 
 
-if len(sys.argv) != 2:
-    sys.exit("Usage: python maze.py maze.txt")
-
-m = Maze(sys.argv[1])
-print("Maze:")
-m.print()
-print("Solving...")
-m.solve()
-print("States Explored:", m.num_explored)
-print("Solution:")
-m.print()
-m.output_image("maze.png", show_explored=True)
+# Columns of the summary written in batch mode
+SUMMARY_FIELDS = ("file", "strategy", "solved", "explored", "length", "load_seconds", "solve_seconds", "error")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve mazes")
+    parser.add_argument("maze", nargs="?", help="maze file to solve")
+    parser.add_argument("strategy", nargs="?", default="dfs", choices=STRATEGIES + ("all",))
+    parser.add_argument("--image", default="maze.png", help="image file of the solution")
+    parser.add_argument("--batch", metavar="DIR",
+                        help="solve every .txt maze in DIR instead of one maze")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(),
+                        help="number of worker processes in batch mode")
+    parser.add_argument("--summary", default="summary.csv",
+                        help="CSV file of per-maze results in batch mode")
+    args = parser.parse_args()
+
+    if args.batch:
+        if args.maze is not None:
+            # A strategy given on its own lands in the first positional
+            args.strategy = args.maze
+        if args.strategy == "all" or args.strategy not in STRATEGIES:
+            parser.error("batch mode needs a single strategy")
+        run_batch(args.batch, args.strategy, args.workers, args.summary)
+        return
+    if args.maze is None:
+        parser.error("a maze file or --batch DIR is required")
+
+    m = Maze(args.maze)
+
+    if args.strategy == "all":
+        print(f"{'Strategy':<14}{'Explored':>10}{'Length':>10}{'Time (ms)':>12}")
+        for name in STRATEGIES:
+            try:
+                m.solve(name)
+            except Exception as e:
+                length, error = "-", f"  {e}"
+            else:
+                length, error = len(m.solution[1]), ""
+            print(f"{name:<14}{m.num_explored:>10}{length:>10}{m.solve_time * 1000:>12.2f}{error}")
+        return
+
+    print("Maze:")
+    m.print()
+    print("Solving...")
+    m.solve(args.strategy)
+    print("States Explored:", m.num_explored)
+    print("Path Length:", len(m.solution[1]))
+    print(f"Time: {m.solve_time * 1000:.2f}ms")
+    print("Solution:")
+    m.print()
+    m.output_image(args.image, show_explored=True)
+
+
+def run_batch(directory, strategy, workers, summary):
+    """
+    Solves a directory of mazes across worker processes, writes one
+    row per maze to a CSV summary and prints the totals.
+    """
+    started = time.perf_counter()
+    results = solve_directory(directory, strategy, workers)
+    elapsed = time.perf_counter() - started
+
+    with open(summary, "w", newline="") as f:
+        writer = csv.DictWriter(f, SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+    solved = sum(result["solved"] for result in results)
+    busy = sum(result["load_seconds"] + result["solve_seconds"] for result in results)
+    print(f"Solved {solved} of {len(results)} mazes with {strategy} in {elapsed:.2f}s "
+          f"({busy:.2f}s of loading and solving across {workers} workers)")
+    print(f"Wrote {summary}")
+
+
+def solve_directory(directory, strategy="dfs", workers=None):
+    """
+    Solves every .txt maze in a directory with a pool of worker
+    processes, returning the result of solve_file for each maze
+    in order of file name.
+    """
+    filenames = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.endswith(".txt")
+    )
+    tasks = [(filename, strategy) for filename in filenames]
+    with multiprocessing.Pool(workers) as pool:
+        return pool.starmap(solve_file, tasks, chunksize=1)
+
+
+def solve_file(filename, strategy="dfs"):
+    """
+    Loads and solves one maze file, returning a dictionary with the
+    states explored, path length and timings, or the error raised.
+    """
+    result = dict.fromkeys(SUMMARY_FIELDS)
+    result.update(file=filename, strategy=strategy, solved=False, load_seconds=0.0, solve_seconds=0.0)
+    started = time.perf_counter()
+    try:
+        m = Maze(filename)
+    except Exception as e:
+        result["error"] = str(e)
+        return result
+    finally:
+        result["load_seconds"] = time.perf_counter() - started
+
+    try:
+        m.solve(strategy)
+    except Exception as e:
+        result["error"] = str(e)
+    else:
+        result["solved"] = True
+        result["length"] = len(m.solution[1])
+    result["explored"] = m.num_explored
+    result["solve_seconds"] = m.solve_time
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""
+Bitboard engine for m,n,k-games such as tic-tac-toe
+"""
+
+import functools
+import time
+
+# Indices of the players in Board.marks
+X = 0
+O = 1
+
+# Kinds of bounds stored in a transposition table
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Score of a won game in a depth-limited search, less the number of
+# moves taken to win it; it stays above any heuristic score
+WIN = 1 << 30
+
+# Boards with more cells than this are searched to a limited depth
+# over only the empty cells within two cells of a mark
+NEARBY_CELLS = 64
+
+
+class Timeout(Exception):
+    """
+    Raised inside a timed search once its deadline has passed
+    or it has been cancelled.
+    """
+
+
+class Board():
+    """
+    Position of an m,n,k-game: players take turns to mark cells of a
+    board with `rows` rows and `cols` columns, and the first to get `k`
+    marks in a row, column or diagonal wins. X moves first.
+
+    Each player's marks are one int, with bit i * cols + j set when the
+    player has marked cell (i, j). Moves are made and unmade in place,
+    only checking the winning lines through the cell just marked.
+    """
+
+    def __init__(self, rows=3, cols=3, k=3):
+        if rows < 1 or cols < 1 or not 1 <= k <= max(rows, cols):
+            raise ValueError("k must fit on a board with at least one cell")
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.size = rows * cols
+        self.full = (1 << self.size) - 1
+        self.masks, self.lines, self.order, self.inner = geometry(rows, cols, k)
+
+        self.marks = [0, 0]
+        self.turn = X
+        self.history = []
+        self.winner = None
+
+        # Number of moves made, counting those later unmade
+        self.nodes = 0
+
+    @classmethod
+    def from_lists(cls, board, k, x="X", o="O"):
+        """
+        Builds a position from a list of rows of cells holding `x`, `o`
+        or anything else for an empty cell.
+        """
+        position = cls(len(board), len(board[0]), k)
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell == x:
+                    position.marks[X] |= 1 << (i * position.cols + j)
+                elif cell == o:
+                    position.marks[O] |= 1 << (i * position.cols + j)
+        counts = [marks.bit_count() for marks in position.marks]
+        position.turn = O if counts[X] > counts[O] else X
+        for player in (X, O):
+            marks = position.marks[player]
+            if any(marks & mask == mask for mask in position.masks):
+                position.winner = player
+                break
+        return position
+
+    def make(self, cell):
+        """
+        Marks an empty cell for the player to move.
+        """
+        marks = self.marks[self.turn] | 1 << cell
+        self.marks[self.turn] = marks
+        for mask in self.lines[cell]:
+            if marks & mask == mask:
+                self.winner = self.turn
+                break
+        self.history.append(cell)
+        self.turn ^= 1
+        self.nodes += 1
+
+    def unmake(self):
+        """
+        Takes back the last move made.
+        """
+        cell = self.history.pop()
+        self.turn ^= 1
+        self.marks[self.turn] &= ~(1 << cell)
+        self.winner = None
+
+    def empty(self):
+        """
+        Returns the bits of the empty cells.
+        """
+        return self.full & ~(self.marks[X] | self.marks[O])
+
+    def actions(self):
+        """
+        Returns the empty cells, the most promising first.
+        """
+        empty = self.empty()
+        return [cell for cell in self.order if empty >> cell & 1]
+
+    def nearby(self):
+        """
+        Returns the bits of the empty cells at most two cells away from
+        a mark in any direction, or of every cell if none is marked.
+        """
+        spread = self.marks[X] | self.marks[O]
+        if not spread:
+            return self.full
+        not_first, not_last = self.inner
+        for _ in range(2):
+            spread |= (spread << 1) & not_first | (spread >> 1) & not_last
+            spread |= spread << self.cols | spread >> self.cols
+        return spread & self.empty()
+
+    def terminal(self):
+        return self.winner is not None or not self.empty()
+
+    def utility(self):
+        """
+        Returns 1 if X has won, -1 if O has won, 0 otherwise.
+        """
+        if self.winner is None:
+            return 0
+        return 1 if self.winner == X else -1
+
+    def key(self):
+        """
+        Returns an int identifying the position, for transposition tables.
+        """
+        return self.marks[X] | self.marks[O] << self.size
+
+    def action(self, cell):
+        """
+        Returns the (i, j) action marking a cell.
+        """
+        return divmod(cell, self.cols)
+
+
+@functools.lru_cache(maxsize=None)
+def geometry(rows, cols, k):
+    """
+    Returns the winning line masks of a board, the masks through each
+    cell, the cells ordered by how many lines run through them and then
+    by closeness to the center, and masks of the cells not in the first
+    and not in the last column.
+    """
+    masks = []
+    for i in range(rows):
+        for j in range(cols):
+            for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                if not (0 <= end_i < rows and 0 <= end_j < cols):
+                    continue
+                mask = 0
+                for step in range(k):
+                    mask |= 1 << ((i + di * step) * cols + j + dj * step)
+                masks.append(mask)
+    masks = tuple(masks)
+    lines = tuple(
+        tuple(mask for mask in masks if mask >> cell & 1) for cell in range(rows * cols)
+    )
+    order = tuple(sorted(
+        range(rows * cols),
+        key=lambda cell: (-len(lines[cell]), (2 * (cell // cols) - rows + 1) ** 2 + (2 * (cell % cols) - cols + 1) ** 2)
+    ))
+    first = sum(1 << i * cols for i in range(rows))
+    full = (1 << rows * cols) - 1
+    inner = (full & ~first, full & ~(first << cols - 1))
+    return masks, lines, order, inner
+
+
+def negamax(board, alpha, beta, table):
+    """
+    Returns the score of the position for the player to move, searching
+    with alpha-beta pruning and a transposition table. A score at or
+    below alpha, or at or above beta, is only a bound on the true score.
+    """
+    if board.winner is not None:
+        return -1
+    if not board.empty():
+        return 0
+
+    key = board.key()
+    entry = table.get(key)
+    if entry is not None:
+        score, bound = entry
+        if bound == EXACT or (bound == LOWER and score >= beta) or (bound == UPPER and score <= alpha):
+            return score
+
+    original_alpha = alpha
+    best_score = -2
+    for cell in board.actions():
+        board.make(cell)
+        score = -negamax(board, -beta, -alpha, table)
+        board.unmake()
+        if score > best_score:
+            best_score = score
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+    if best_score <= original_alpha:
+        table[key] = (best_score, UPPER)
+    elif best_score >= beta:
+        table[key] = (best_score, LOWER)
+    else:
+        table[key] = (best_score, EXACT)
+    return best_score
+
+
+def best_move(board, table=None):
+    """
+    Returns (score, cell) for the player to move, where score is 1 if X
+    can force a win, -1 if O can and 0 otherwise. The root tries cells in
+    order and keeps the first best one, like the list-based minimax.
+    """
+    if table is None:
+        table = {}
+    best_score = -2
+    best_cell = None
+    alpha = -2
+    empty = board.empty()
+    for cell in range(board.size):
+        if not empty >> cell & 1:
+            continue
+        board.make(cell)
+        score = -negamax(board, -2, -alpha, table)
+        board.unmake()
+        if score > best_score:
+            best_score = score
+            best_cell = cell
+            alpha = score
+            if alpha >= 1:
+                break
+    sign = 1 if board.turn == X else -1
+    return sign * best_score, best_cell
+
+
+def evaluate(board):
+    """
+    Returns a heuristic score of the position for the player to move.
+    Every winning line still open to only one player counts for that
+    player, four times as much for each mark already on it.
+    """
+    mine = board.marks[board.turn]
+    theirs = board.marks[board.turn ^ 1]
+    score = 0
+    for mask in board.masks:
+        if mine & mask:
+            if not theirs & mask:
+                score += 1 << 2 * (mine & mask).bit_count()
+        elif theirs & mask:
+            score -= 1 << 2 * (theirs & mask).bit_count()
+    return score
+
+
+def candidates(board):
+    """
+    Returns the cells a timed search tries, the most promising first.
+    """
+    if board.size <= NEARBY_CELLS:
+        return board.actions()
+    nearby = board.nearby()
+    if not nearby:
+        return board.actions()
+    return [cell for cell in board.order if nearby >> cell & 1]
+
+
+def search(board, depth, ply, alpha, beta, deadline, table, cancel=None):
+    """
+    Returns the score of the position for the player to move, searching
+    `depth` moves ahead with alpha-beta pruning and scoring positions at
+    that depth with evaluate. Raises Timeout once the deadline passes
+    or the `cancel` event, if any, is set.
+    """
+    if board.winner is not None:
+        return ply - WIN
+    if not board.empty():
+        return 0
+    if depth == 0:
+        return evaluate(board)
+    if time.perf_counter() > deadline or (cancel is not None and cancel.is_set()):
+        raise Timeout
+
+    # Entries are (depth, score, bound, best cell); any entry still
+    # gives a good cell to try first
+    key = board.key()
+    entry = table.get(key)
+    moves = candidates(board)
+    if entry is not None:
+        entry_depth, score, bound, cell = entry
+        if entry_depth >= depth and (
+                bound == EXACT or (bound == LOWER and score >= beta) or (bound == UPPER and score <= alpha)):
+            return score
+        moves.remove(cell)
+        moves.insert(0, cell)
+
+    original_alpha = alpha
+    best_score = -WIN - 1
+    best_cell = moves[0]
+    for cell in moves:
+        board.make(cell)
+        score = -search(board, depth - 1, ply + 1, -beta, -alpha, deadline, table, cancel)
+        board.unmake()
+        if score > best_score:
+            best_score = score
+            best_cell = cell
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+    if best_score <= original_alpha:
+        bound = UPPER
+    elif best_score >= beta:
+        bound = LOWER
+    else:
+        bound = EXACT
+    table[key] = (depth, best_score, bound, best_cell)
+    return best_score
+
+
+def timed_move(board, seconds, cancel=None):
+    """
+    Returns (score, cell, depth) for the player to move, searching one
+    move deeper at a time until `seconds` have passed, and keeping the
+    best cell of the deepest search that finished. Stops early once the
+    end of the game is in reach, or as soon as a `cancel` event is set.
+    Scores are from the point of view of the player to move, and above
+    WIN - board.size for a forced win.
+    """
+    deadline = time.perf_counter() + seconds
+    made = len(board.history)
+    table = {}
+    moves = candidates(board)
+    best_score, best_cell, completed = 0, moves[0], 0
+    for depth in range(1, len(board.actions()) + 1):
+        try:
+            best_score = search(board, depth, 0, -WIN - 1, WIN + 1, deadline, table, cancel)
+        except Timeout:
+            # Take back the moves the interrupted search left made
+            while len(board.history) > made:
+                board.unmake()
+            break
+        best_cell = table[board.key()][3]
+        completed = depth
+        if abs(best_score) > WIN - board.size:
+            break
+    return best_score, best_cell, completed
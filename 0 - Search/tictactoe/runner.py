@@ -1,10 +1,25 @@
 import pygame
 import sys
+import threading
 import time
 
 import tictactoe as ttt
 import copy
 
+# Board size and number in a row needed to win, from the command line
+if len(sys.argv) not in (1, 4):
+    sys.exit("Usage: python runner.py [rows cols k]")
+rows, cols, k = (int(arg) for arg in sys.argv[1:]) if len(sys.argv) == 4 else (3, 3, 3)
+if rows < 1 or cols < 1 or not 1 <= k <= max(rows, cols):
+    sys.exit("k must fit on a board with at least one cell")
+ttt.K = k
+
+# Seconds the AI may think about a move on boards too large to solve
+AI_SECONDS = 1.0
+
+# Seconds the AI always appears to think before it moves
+AI_DELAY = 0.5
+
 pygame.init()
 size = width, height = 600, 400
 
@@ -16,11 +31,39 @@ screen = pygame.display.set_mode(size)
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+
+# Tiles shrink to fit larger boards on the screen
+tile_size = min(80, (height - 140) // rows, (width - 40) // cols)
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", tile_size * 3 // 4)
+
+# Solve every position up front so AI moves are a table lookup
+if (rows, cols, k) == (3, 3, 3):
+    ttt.load_solutions()
+
+
+def start_search(board):
+    """
+    Starts searching for the AI's move on a worker thread, so that the
+    window keeps drawing and handling events while the AI thinks.
+    Returns a dictionary holding the thread, an event to cancel the
+    search, when it started and, once the thread is done, the move.
+    """
+    search = {"cancel": threading.Event(), "started": time.time(), "move": None}
+
+    def work():
+        if (rows, cols, k) == (3, 3, 3):
+            search["move"] = ttt.minimax(board)
+        else:
+            search["move"] = ttt.timed_minimax(board, AI_SECONDS, search["cancel"])
+
+    search["thread"] = threading.Thread(target=work, daemon=True)
+    search["thread"].start()
+    return search
+
 
 user = None
-board = ttt.initial_state()
-ai_turn = False
+board = ttt.initial_state(rows, cols)
+search = None
 
 while True:
 
@@ -68,19 +111,18 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_origin = (width / 2 - (cols / 2 * tile_size),
+                       height / 2 - (rows / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(rows):
             row = []
-            for j in range(3):
+            for j in range(cols):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
                     tile_size, tile_size
                 )
-                pygame.draw.rect(screen, white, rect, 3)
+                pygame.draw.rect(screen, white, rect, max(1, tile_size // 25))
 
                 if board[i][j] != ttt.EMPTY:
                     move = moveFont.render(board[i][j], True, white)
@@ -103,48 +145,47 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            title = "Computer thinking" + "." * int(time.time() * 3 % 4)
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, searched in the background
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-
-                ai_turn = False
-            else:
-                ai_turn = True
+            if search is None:
+                search = start_search(board)
+            elif not search["thread"].is_alive() and time.time() - search["started"] >= AI_DELAY:
+                board = ttt.result(board, search["move"])
+                search = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(rows):
+                for j in range(cols):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
                         
 
-        if game_over:
-            againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
-            again = mediumFont.render("Play Again", True, black)
-            againRect = again.get_rect()
-            againRect.center = againButton.center
-            pygame.draw.rect(screen, white, againButton)
-            screen.blit(again, againRect)
-            click, _, _ = pygame.mouse.get_pressed()
-            if click == 1:
-                mouse = pygame.mouse.get_pos()
-                if againButton.collidepoint(mouse):
-                    time.sleep(0.2)
-                    user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+        # Let the user start over at any time, cancelling the AI's search
+        againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
+        again = mediumFont.render("Play Again" if game_over else "Reset", True, black)
+        againRect = again.get_rect()
+        againRect.center = againButton.center
+        pygame.draw.rect(screen, white, againButton)
+        screen.blit(again, againRect)
+        click, _, _ = pygame.mouse.get_pressed()
+        if click == 1:
+            mouse = pygame.mouse.get_pos()
+            if againButton.collidepoint(mouse):
+                time.sleep(0.2)
+                if search is not None:
+                    search["cancel"].set()
+                    search = None
+                user = None
+                board = ttt.initial_state(rows, cols)
 
     pygame.display.flip()
@@ -0,0 +1,57 @@
+"""
+Tests that alpha-beta search agrees with exhaustive minimax
+"""
+
+import tictactoe as ttt
+
+
+def reachable_positions():
+    """
+    Returns every non-terminal position reachable from the empty board.
+    """
+    start = ttt.initial_state()
+    seen = {ttt.encode(start): start}
+    layer = [start]
+    while layer:
+        next_layer = []
+        for board in layer:
+            if ttt.terminal(board):
+                continue
+            for action in ttt.actions(board):
+                child = ttt.result(board, action)
+                key = ttt.encode(child)
+                if key not in seen:
+                    seen[key] = child
+                    next_layer.append(child)
+        layer = next_layer
+    return [board for board in seen.values() if not ttt.terminal(board)]
+
+
+def exhaustive(board):
+    """
+    Returns the action of the exhaustive search without pruning.
+    """
+    if ttt.player(board) == ttt.X:
+        return ttt.Max(board)[1]
+    return ttt.Min(board)[1]
+
+
+def empty_cells(board):
+    return sum(row.count(ttt.EMPTY) for row in board)
+
+
+def test_alphabeta_matches_exhaustive_search():
+    positions = [board for board in reachable_positions() if empty_cells(board) <= 6]
+    assert positions
+    for board in positions:
+        assert ttt.alphabeta(board) == exhaustive(board), board
+
+
+def test_alphabeta_visits_fewer_nodes():
+    board = ttt.initial_state()
+    ttt.nodes = 0
+    action = exhaustive(board)
+    exhaustive_nodes = ttt.nodes
+
+    assert ttt.alphabeta(board) == action
+    assert 0 < ttt.nodes < exhaustive_nodes
@@ -2,20 +2,66 @@
 Tic Tac Toe Player
 """
 
-import numpy as np
-import copy
+import json
+import math
+import os
+
+import bitboard
 
 X = "X"
 O = "O"
 EMPTY = None
 
-def initial_state():
+# Number of marks in a row needed to win; boards of other sizes
+# come from initial_state
+K = 3
+
+# Number of positions visited by the last minimax or alphabeta call
+nodes = 0
+
+# Transposition tables of the bitboard search, by (rows, cols, K)
+tables = {}
+
+# Minimax values of positions, keyed by canonical board encoding
+cache = {}
+
+# Optimal action for every reachable position, keyed by board encoding,
+# once loaded by load_solutions
+solutions = None
+
+SOLUTIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "solutions.json")
+
+# Bump whenever the layout of the solutions file changes
+SOLUTIONS_VERSION = 1
+
+
+def board_symmetries(size):
+    """
+    Returns the 8 rotations and reflections of a square board as
+    permutations of the cells of its encoding.
+    """
+    permutations = []
+    for reflect in (False, True):
+        for turns in range(4):
+            permutation = []
+            for i in range(size):
+                for j in range(size):
+                    r, c = i, size - 1 - j if reflect else j
+                    for _ in range(turns):
+                        r, c = c, size - 1 - r
+                    permutation.append(r * size + c)
+            permutations.append(tuple(permutation))
+    return permutations
+
+
+SYMMETRIES = board_symmetries(3)
+
+
+def initial_state(rows=3, cols=3):
     """
     Returns starting state of the board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * cols for _ in range(rows)]
 
 
 def player(board):
@@ -55,7 +101,7 @@ def result(brd, action):
     Returns the board that results from making move (i, j) on the board.
     """
     
-    board = copy.deepcopy(brd)
+    board = [row[:] for row in brd]
     
     if not brd[action[0]][action[1]] == EMPTY:
         raise Exception('Action not allowed')
@@ -70,41 +116,20 @@ def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-    
-    
-    # Rad
-    for row in board:
-        if row[0] == row[1] and row[1] == row[2] and not row[2] == EMPTY:
-            return row[0]
-        
-    # Kolonne
-    for col in np.array(board).T:
-        if col[0] == col[1] and col[1] == col[2] and not col[2] == EMPTY:
-            return col[0]
-        
-    # Diagonal
-    if board[0][0] == board[1][1] and board[1][1] == board[2][2] and not board[2][2] == EMPTY:
-        return board[0][0]
-    if board[2][0] == board[1][1] and board[1][1] == board[0][2] and not board[0][2] == EMPTY:
-        return board[2][0]
-    
-    return None
-    
+    position = bitboard.Board.from_lists(board, K)
+    if position.winner is None:
+        return None
+    return X if position.winner == bitboard.X else O
+
 
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
     if winner(board) != None:
-         return True
-
-    numpyBoard = np.array(board)
-    emptyCount = np.count_nonzero(numpyBoard == EMPTY)
-    if emptyCount == 0:
         return True
+    return all(cell != EMPTY for row in board for cell in row)
 
-    return False
-    
 
 def utility(board):
     """
@@ -122,24 +147,138 @@ def utility(board):
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
+
+    Looks the action up when a solution table is loaded. Otherwise
+    scores every action by the cached value of the board it leads to,
+    keeping the first best action in the order of actions(board).
     """
+    global nodes
+    nodes = 0
     if terminal(board):
         return None
+    if solutions is not None and encode(board) in solutions:
+        return solutions[encode(board)]
+
+    # Boards other than 3x3 tic-tac-toe are searched as bitboards
+    if len(board) != 3 or len(board[0]) != 3 or K != 3:
+        position = bitboard.Board.from_lists(board, K)
+        table = tables.setdefault((position.rows, position.cols, K), {})
+        _, cell = bitboard.best_move(position, table)
+        nodes = position.nodes
+        return position.action(cell)
 
     P = player(board)
-    if P == X:
-        return Max(board)[1]
-    else:
-        return Min(board)[1]
+    best_score = None
+    best_action = None
+    for action in actions(board):
+        score = value(result(board, action))
+        if best_score is None or (score > best_score if P == X else score < best_score):
+            best_score = score
+            best_action = action
+    return best_action
+
+
+def value(board):
+    """
+    Returns the minimax value of a board. Values are cached under the
+    canonical encoding, so each set of symmetric positions is solved once.
+    """
+    global nodes
+    nodes += 1
+    if terminal(board):
+        return utility(board)
+
+    key = canonical(board)
+    if key not in cache:
+        scores = [value(result(board, action)) for action in actions(board)]
+        cache[key] = max(scores) if player(board) == X else min(scores)
+    return cache[key]
+
+
+def encode(board):
+    """
+    Returns a string with one character per cell of the board.
+    """
+    return "".join("." if cell is EMPTY else cell for row in board for cell in row)
+
+
+def canonical(board):
+    """
+    Returns the smallest encoding among the rotations and reflections
+    of the board, which is the same for all of them.
+    """
+    encoding = encode(board)
+    return min("".join(encoding[k] for k in permutation) for permutation in SYMMETRIES)
+
+
+def build_solutions():
+    """
+    Returns a dictionary mapping the encoding of every reachable,
+    unfinished board to the action minimax picks on it.
+    """
+    global solutions
+    loaded, solutions = solutions, None
+    table = {}
+    stack = [initial_state()]
+    try:
+        while stack:
+            board = stack.pop()
+            key = encode(board)
+            if key in table or terminal(board):
+                continue
+            table[key] = minimax(board)
+            stack.extend(result(board, action) for action in actions(board))
+    finally:
+        solutions = loaded
+    return table
+
+
+def load_solutions(filename=SOLUTIONS_FILE):
+    """
+    Loads the solution table from a file, first building and saving it
+    if the file is missing or out of date.
+    """
+    global solutions
+    try:
+        with open(filename) as f:
+            contents = json.load(f)
+        if contents.get("version") != SOLUTIONS_VERSION:
+            raise ValueError("stale solutions file")
+        table = {key: tuple(action) for key, action in contents["actions"].items()}
+    except (OSError, ValueError, KeyError, TypeError):
+        table = build_solutions()
+        save_solutions(table, filename)
+    solutions = table
+
+
+def save_solutions(table, filename=SOLUTIONS_FILE):
+    """
+    Writes a solution table built by build_solutions to a file.
+    """
+    temporary = f"{filename}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "w") as f:
+            json.dump({"version": SOLUTIONS_VERSION, "actions": table}, f)
+        os.replace(temporary, filename)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
 
 
 
 
 def Max(board):
+    """
+    Returns (score, action) for X by exhaustive search, without the cache.
+    """
+    global nodes
+    nodes += 1
     if terminal(board):
         return (utility(board), None)
 
-    best_score = -np.inf
+    best_score = -math.inf
     best_action = None
     for action in actions(board):
         Result = Min(result(board, action))
@@ -151,10 +290,15 @@ def Max(board):
 
 
 def Min(board):
+    """
+    Returns (score, action) for O by exhaustive search, without the cache.
+    """
+    global nodes
+    nodes += 1
     if terminal(board):
         return (utility(board), None)
 
-    best_score = np.inf
+    best_score = math.inf
     best_action = None
     for action in actions(board):
         Result = Max(result(board, action))
@@ -162,4 +306,100 @@ def Min(board):
             best_score = Result[0]
             best_action = action
 
-    return (best_score, best_action)
\ No newline at end of file
+    return (best_score, best_action)
+
+
+def timed_minimax(board, seconds=1.0, cancel=None):
+    """
+    Returns the best action found for the current player in about
+    `seconds`, for boards too large to search to the end. Searches the
+    bitboard with alpha-beta one move deeper at a time, scoring the
+    positions where it stops by their open lines, and returns the best
+    action of the deepest search finished before the time ran out or
+    the `cancel` event, if any, was set.
+    """
+    global nodes
+    if terminal(board):
+        return None
+    position = bitboard.Board.from_lists(board, K)
+    _, cell, _ = bitboard.timed_move(position, seconds, cancel)
+    nodes = position.nodes
+    return position.action(cell)
+
+
+def alphabeta(board):
+    """
+    Returns the same optimal action as minimax, searching with alpha-beta
+    pruning. Below the root, moves are tried center and corners first so
+    that good moves are found early and more of the tree is cut off. The
+    root keeps the order of actions, so that ties between equally good
+    actions are broken the same way as in minimax.
+    """
+    global nodes
+    nodes = 0
+    if terminal(board):
+        return None
+
+    P = player(board)
+    if P == X:
+        return AlphaMax(board, -math.inf, math.inf, actions(board))[1]
+    else:
+        return AlphaMin(board, -math.inf, math.inf, actions(board))[1]
+
+
+def ordered_actions(board):
+    """
+    Returns the actions available on the board, those on the most
+    winning lines first: on 3x3, the center, then corners, then edges.
+    """
+    cols = len(board[0])
+    order = bitboard.geometry(len(board), cols, K)[2]
+    return tuple(divmod(cell, cols) for cell in order if board[cell // cols][cell % cols] == EMPTY)
+
+
+def AlphaMax(board, alpha, beta, moves=None):
+    """
+    Returns (score, action) for X. A score at or below alpha, or at or
+    above beta, is only a bound on the true score.
+    """
+    global nodes
+    nodes += 1
+    if terminal(board):
+        return (utility(board), None)
+
+    best_score = -math.inf
+    best_action = None
+    for action in moves or ordered_actions(board):
+        Result = AlphaMin(result(board, action), alpha, beta)
+        if Result[0] > best_score:
+            best_score = Result[0]
+            best_action = action
+            alpha = max(alpha, best_score)
+            if alpha >= beta:
+                break
+
+    return (best_score, best_action)
+
+
+def AlphaMin(board, alpha, beta, moves=None):
+    """
+    Returns (score, action) for O. A score at or below alpha, or at or
+    above beta, is only a bound on the true score.
+    """
+    global nodes
+    nodes += 1
+    if terminal(board):
+        return (utility(board), None)
+
+    best_score = math.inf
+    best_action = None
+    for action in moves or ordered_actions(board):
+        Result = AlphaMax(result(board, action), alpha, beta)
+        if Result[0] < best_score:
+            best_score = Result[0]
+            best_action = action
+            beta = min(beta, best_score)
+            if alpha >= beta:
+                break
+
+    return (best_score, best_action)